@@ -813,11 +813,12 @@ export function GardenPlanner() {
               isLoading={appState.isLoadingRecommendations}
               onZipCodeSubmit={fetchPlantRecommendations}
               onRequestMore={handleRequestMore}
-              onAskQuestion={async (q: string) => {
+              onAskQuestion={async (q: string, onPartialAnswer) => {
                 if (!appState.currentGarden) throw new Error("Garden not set");
                 return gardenService.askGardenQuestion(
                   appState.currentGarden.id,
-                  q
+                  q,
+                  onPartialAnswer
                 );
               }}
               onPlantDragStart={(p) => setDraggingPlant(p)}
@@ -11,7 +11,10 @@ interface RecommendationsPanelProps {
   isLoading: boolean;
   onZipCodeSubmit: (zipCode: string) => void;
   onRequestMore?: () => void;
-  onAskQuestion?: (question: string) => Promise<string>;
+  onAskQuestion?: (
+    question: string,
+    onPartialAnswer?: (answerSoFar: string) => void
+  ) => Promise<string>;
   onPlantDragStart?: (plant: Plant) => void;
   onPlantDragEnd?: () => void;
 }
@@ -113,7 +116,7 @@ export function RecommendationsPanel({
     setAskError(null);
     setAnswer(null);
     try {
-      const resp = await onAskQuestion(question.trim());
+      const resp = await onAskQuestion(question.trim(), setAnswer);
       setAnswer(resp);
       setQuestion("");
     } catch (err) {
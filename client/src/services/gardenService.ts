@@ -10,6 +10,9 @@ import {
   StructureShape
 } from '../types/garden';
 
+// Interval between status checks of a queued recommendation job
+const RECOMMENDATION_JOB_POLL_MS = 1000;
+
 class GardenService {
   private getTokenCallback: (() => Promise<string | null>) | null = null;
 
@@ -124,6 +127,34 @@ class GardenService {
     return json.data.recommendedPlants;
   }
 
+  /**
+   * Poll a queued recommendation job (returned with 202 Accepted) until it
+   * finishes, and return the garden's recommendations.
+   */
+  private async waitForRecommendationJob(
+    response: Response,
+    errorMessage: string
+  ): Promise<import('../types/garden').PlantRecommendations> {
+    const statusUrl = `${API_BASE_URL}${response.headers.get('Location')}`;
+    let job = await response.json();
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise((resolve) =>
+        setTimeout(resolve, RECOMMENDATION_JOB_POLL_MS)
+      );
+      const poll = await fetch(statusUrl, {
+        headers: await this.getAuthHeaders(),
+      });
+      if (!poll.ok) {
+        throw new Error(errorMessage);
+      }
+      job = await poll.json();
+    }
+    if (job.status !== 'succeeded' || !job.result) {
+      throw new Error(job.error || errorMessage);
+    }
+    return job.result.recommendedPlants;
+  }
+
   async generateGardenRecommendations(
     gardenId: number,
     forceRefresh = false
@@ -139,6 +170,12 @@ class GardenService {
     if (!response.ok) {
       throw new Error('Failed to generate recommendations');
     }
+    if (response.status === 202) {
+      return this.waitForRecommendationJob(
+        response,
+        'Failed to generate recommendations'
+      );
+    }
     const json = await response.json();
     return json.data.recommendedPlants;
   }
@@ -162,27 +199,64 @@ class GardenService {
     if (!response.ok) {
       throw new Error('Failed to get more recommendations');
     }
-    const json = await response.json();
-    return json.data.recommendedPlants;
+    return this.waitForRecommendationJob(
+      response,
+      'Failed to get more recommendations'
+    );
   }
 
   async askGardenQuestion(
     gardenId: number,
-    question: string
+    question: string,
+    onPartialAnswer?: (answerSoFar: string) => void
   ): Promise<string> {
     const response = await fetch(
-      `${API_BASE_URL}/api/v1/garden/gardens/${gardenId}/ask`,
+      `${API_BASE_URL}/api/v1/garden/gardens/${gardenId}/ask/stream`,
       {
         method: 'POST',
         headers: await this.getAuthHeaders(),
         body: JSON.stringify({ question }),
       }
     );
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
       throw new Error('Failed to get answer');
     }
-    const json = await response.json();
-    return json.answer as string;
+
+    // Server-Sent Events: `data: {"text": ...}` per chunk, then `event: done`
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let data = '';
+        for (const line of rawEvent.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (event === 'error') {
+          throw new Error('Failed to get answer');
+        }
+        if (event === 'done') {
+          return answer.trim();
+        }
+        if (data) {
+          answer += JSON.parse(data).text ?? '';
+          onPartialAnswer?.(answer);
+        }
+      }
+    }
+    return answer.trim();
   }
 
   async listNotes(gardenId: number): Promise<GardenNote[]> {
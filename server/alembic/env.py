@@ -11,7 +11,7 @@ from alembic import context
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.db.base_class import Base
-from app.models.garden import Garden, GardenElement
+import app.models  # noqa: F401  (registers every model on Base.metadata)
 from app.core.config import settings
 
 # this is the Alembic Config object, which provides
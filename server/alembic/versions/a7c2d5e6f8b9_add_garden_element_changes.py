@@ -0,0 +1,69 @@
+"""Add garden_element_changes change log
+
+Revision ID: a7c2d5e6f8b9
+Revises: f6b1c4d5e7a8
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c2d5e6f8b9"
+down_revision: Union[str, None] = "f6b1c4d5e7a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "garden_element_changes",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "garden_id",
+            sa.Integer(),
+            sa.ForeignKey("gardens.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("element_id", sa.String(length=255), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False, server_default="false"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint(
+            "garden_id",
+            "element_id",
+            name="uq_garden_element_changes_garden_id_element_id",
+        ),
+    )
+    op.create_index(
+        "ix_garden_element_changes_garden_id_version",
+        "garden_element_changes",
+        ["garden_id", "version"],
+    )
+    # Seed the log with every existing element at its garden's current version
+    op.execute(
+        """
+        INSERT INTO garden_element_changes (garden_id, element_id, version, deleted)
+        SELECT garden_elements.garden_id, garden_elements.element_id,
+               gardens.version, false
+        FROM garden_elements JOIN gardens ON gardens.id = garden_elements.garden_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_garden_element_changes_garden_id_version",
+        table_name="garden_element_changes",
+    )
+    op.drop_table("garden_element_changes")
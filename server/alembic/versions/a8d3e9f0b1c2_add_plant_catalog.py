@@ -0,0 +1,70 @@
+"""Add plant_catalog and plant_catalog_regions
+
+Revision ID: a8d3e9f0b1c2
+Revises: f7c2d8e9a0b1
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d3e9f0b1c2"
+down_revision: Union[str, None] = "f7c2d8e9a0b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "plant_catalog",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("botanical_name", sa.String(length=255), nullable=False),
+        sa.Column("category", sa.String(length=50), nullable=False),
+        sa.Column("common_name", sa.String(length=255), nullable=True),
+        sa.Column("plant_type", sa.String(length=100), nullable=True),
+        sa.Column("sunlight_needs", sa.String(length=255), nullable=True),
+        sa.Column("water_needs", sa.String(length=255), nullable=True),
+        sa.Column("mature_size", sa.String(length=255), nullable=True),
+        sa.Column("spacing", sa.Float(), nullable=True),
+        sa.Column("curated", sa.Boolean(), nullable=False, server_default=sa.false()),
+        *_timestamps(),
+        sa.UniqueConstraint("botanical_name", name="uq_plant_catalog_botanical_name"),
+    )
+    op.create_table(
+        "plant_catalog_regions",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "plant_id",
+            sa.Integer(),
+            sa.ForeignKey("plant_catalog.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("region", sa.String(length=50), nullable=False),
+        sa.Column("seen_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("curated", sa.Boolean(), nullable=False, server_default=sa.false()),
+        *_timestamps(),
+        sa.UniqueConstraint(
+            "region", "plant_id", name="uq_plant_catalog_regions_region_plant_id"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("plant_catalog_regions")
+    op.drop_table("plant_catalog")
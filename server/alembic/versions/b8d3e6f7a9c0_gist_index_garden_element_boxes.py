@@ -0,0 +1,54 @@
+"""GiST index on garden element bounding boxes per garden
+
+Revision ID: b8d3e6f7a9c0
+Revises: a7c2d5e6f8b9
+Create Date: 2026-10-17 00:00:00.000000
+
+Backs GET /gardens/{id}/elements?bbox=... on Postgres. All gardens share one
+canvas coordinate space, so the index leads with garden_id (via btree_gist)
+and a viewport lookup only visits that garden's boxes. The box expression
+must match app.services.spatial.element_box(). Other databases use the
+in-process grid index instead, so this is a no-op there.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d3e6f7a9c0"
+down_revision: Union[str, None] = "a7c2d5e6f8b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_garden_elements_box
+            ON garden_elements USING gist (
+                garden_id,
+                box(
+                    point(position_x, position_y),
+                    point(
+                        position_x + coalesce(width, 0.0),
+                        position_y + coalesce(height, 0.0)
+                    )
+                )
+            )
+            """
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_garden_elements_box")
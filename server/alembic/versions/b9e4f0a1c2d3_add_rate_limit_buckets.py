@@ -0,0 +1,43 @@
+"""Add rate_limit_buckets for per-user LLM endpoint rate limiting
+
+Revision ID: b9e4f0a1c2d3
+Revises: a8d3e9f0b1c2
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b9e4f0a1c2d3"
+down_revision: Union[str, None] = "a8d3e9f0b1c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("user_id", sa.String(length=255), nullable=False),
+        sa.Column("bucket", sa.String(length=50), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("refilled_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint(
+            "user_id", "bucket", name="uq_rate_limit_buckets_user_id_bucket"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limit_buckets")
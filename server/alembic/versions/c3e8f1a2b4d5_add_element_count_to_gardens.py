@@ -0,0 +1,37 @@
+"""Add denormalized element_count to gardens
+
+Revision ID: c3e8f1a2b4d5
+Revises: ab6d1c1f6ae6
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e8f1a2b4d5"
+down_revision: Union[str, None] = "ab6d1c1f6ae6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("gardens", sa.Column("element_count", sa.Integer(), nullable=True))
+    # Backfill from the current element rows in one grouped statement
+    op.execute(
+        """
+        UPDATE gardens
+        SET element_count = (
+            SELECT COUNT(*) FROM garden_elements
+            WHERE garden_elements.garden_id = gardens.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("gardens", "element_count")
@@ -0,0 +1,33 @@
+"""Add available_at to recommendation_jobs
+
+Revision ID: c4f8a1b2d3e6
+Revises: b9e4f0a1c2d3
+Create Date: 2026-10-17 00:00:00.000000
+
+Jobs requeued while Gemini is unavailable are not claimed again before
+available_at, so workers don't sleep on them.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f8a1b2d3e6"
+down_revision: Union[str, None] = "b9e4f0a1c2d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "recommendation_jobs",
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("recommendation_jobs", "available_at")
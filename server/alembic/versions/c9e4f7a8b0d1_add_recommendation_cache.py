@@ -0,0 +1,54 @@
+"""Add recommendation_cache shared across gardens and workers
+
+Revision ID: c9e4f7a8b0d1
+Revises: b8d3e6f7a9c0
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e4f7a8b0d1"
+down_revision: Union[str, None] = "b8d3e6f7a9c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recommendation_cache",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("cache_key", sa.String(length=255), nullable=False),
+        sa.Column("prompt_version", sa.String(length=32), nullable=False),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint(
+            "cache_key",
+            "prompt_version",
+            name="uq_recommendation_cache_cache_key_prompt_version",
+        ),
+    )
+    op.create_index(
+        "ix_recommendation_cache_last_used_at",
+        "recommendation_cache",
+        ["last_used_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_recommendation_cache_last_used_at", table_name="recommendation_cache"
+    )
+    op.drop_table("recommendation_cache")
@@ -0,0 +1,43 @@
+"""Add llm_request_locks for coalescing LLM calls across workers
+
+Revision ID: d0f5a8b9c1e2
+Revises: c9e4f7a8b0d1
+Create Date: 2026-10-17 00:00:00.000000
+
+Postgres deployments use advisory locks instead; the table is created
+everywhere so the schema stays identical across databases.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d0f5a8b9c1e2"
+down_revision: Union[str, None] = "c9e4f7a8b0d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_request_locks",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("lock_key", sa.String(length=255), nullable=False),
+        sa.Column("owner", sa.String(length=64), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("lock_key", name="uq_llm_request_locks_lock_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("llm_request_locks")
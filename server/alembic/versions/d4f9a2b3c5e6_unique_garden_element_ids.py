@@ -0,0 +1,106 @@
+"""Unique (garden_id, element_id) on garden_elements
+
+Revision ID: d4f9a2b3c5e6
+Revises: c3e8f1a2b4d5
+Create Date: 2026-10-17 00:00:00.000000
+
+Deletes data: where a garden has several rows with the same element_id, only
+the newest (highest id) row is kept and the others are deleted. The number
+of deleted rows is logged and element_count is recounted.
+
+On Postgres the backing unique index is built CONCURRENTLY and then attached
+as the constraint, so writes to garden_elements are not blocked while it
+builds.
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4f9a2b3c5e6"
+down_revision: Union[str, None] = "c3e8f1a2b4d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    # Keep only the newest row for any duplicated frontend element ID
+    deleted = op.get_bind().execute(
+        sa.text(
+            """
+            DELETE FROM garden_elements
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM garden_elements GROUP BY garden_id, element_id
+            )
+            """
+        )
+    )
+    if deleted.rowcount:
+        logger.warning(
+            f"Deleted {deleted.rowcount} garden_elements rows duplicating the"
+            " element_id of a newer row in the same garden"
+        )
+        # The maintained element_count included the deleted rows
+        op.execute(
+            """
+            UPDATE gardens
+            SET element_count = (
+                SELECT COUNT(*) FROM garden_elements
+                WHERE garden_elements.garden_id = gardens.id
+            )
+            """
+        )
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_unique_constraint(
+            "uq_garden_elements_garden_id_element_id",
+            "garden_elements",
+            ["garden_id", "element_id"],
+        )
+        return
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block. A
+    # failed earlier build leaves an INVALID index behind; drop it first.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS"
+            " uq_garden_elements_garden_id_element_id"
+        )
+        op.execute(
+            """
+            CREATE UNIQUE INDEX CONCURRENTLY uq_garden_elements_garden_id_element_id
+            ON garden_elements (garden_id, element_id)
+            """
+        )
+    # Only a brief lock: the index is already built and valid
+    op.execute(
+        """
+        ALTER TABLE garden_elements
+        ADD CONSTRAINT uq_garden_elements_garden_id_element_id
+        UNIQUE USING INDEX uq_garden_elements_garden_id_element_id
+        """
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_constraint(
+            "uq_garden_elements_garden_id_element_id",
+            "garden_elements",
+            type_="unique",
+        )
+        return
+
+    # Drops the constraint's index with it; a brief lock, nothing is rebuilt
+    op.execute(
+        """
+        ALTER TABLE garden_elements
+        DROP CONSTRAINT uq_garden_elements_garden_id_element_id
+        """
+    )
@@ -0,0 +1,59 @@
+"""Add recommendation_jobs queue
+
+Revision ID: e1a6b9c0d2f3
+Revises: d0f5a8b9c1e2
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a6b9c0d2f3"
+down_revision: Union[str, None] = "d0f5a8b9c1e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recommendation_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "garden_id",
+            sa.Integer(),
+            sa.ForeignKey("gardens.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.String(length=255), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("params", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("worker_id", sa.String(length=64), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_recommendation_jobs_status_id", "recommendation_jobs", ["status", "id"]
+    )
+    op.create_index(
+        "ix_recommendation_jobs_garden_id", "recommendation_jobs", ["garden_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recommendation_jobs_garden_id", table_name="recommendation_jobs")
+    op.drop_index("ix_recommendation_jobs_status_id", table_name="recommendation_jobs")
+    op.drop_table("recommendation_jobs")
@@ -0,0 +1,46 @@
+"""Index garden_notes on (garden_id, created_at DESC)
+
+Revision ID: e5a0b3c4d6f7
+Revises: d4f9a2b3c5e6
+Create Date: 2026-10-17 00:00:00.000000
+
+garden_elements (garden_id, element_id) is already covered by the unique
+constraint from d4f9a2b3c5e6, and garden_recommendations.garden_id by
+uq_garden_recommendations_garden_id, so only the notes index is new here.
+It is built CONCURRENTLY on Postgres so a live database is not locked.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a0b3c4d6f7"
+down_revision: Union[str, None] = "d4f9a2b3c5e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_garden_notes_garden_id_created_at",
+            "garden_notes",
+            ["garden_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_garden_notes_garden_id_created_at",
+            table_name="garden_notes",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
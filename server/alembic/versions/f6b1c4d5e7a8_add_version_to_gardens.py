@@ -0,0 +1,30 @@
+"""Add version to gardens
+
+Revision ID: f6b1c4d5e7a8
+Revises: e5a0b3c4d6f7
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6b1c4d5e7a8"
+down_revision: Union[str, None] = "e5a0b3c4d6f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "gardens",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("gardens", "version")
@@ -0,0 +1,167 @@
+"""Store garden recommendations as one row per plant
+
+Revision ID: f7c2d8e9a0b1
+Revises: e1a6b9c0d2f3
+Create Date: 2026-10-17 00:00:00.000000
+
+Copies each garden_recommendations payload into garden_recommended_plants
+(first occurrence of a botanical name wins) and drops the blob table.
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c2d8e9a0b1"
+down_revision: Union[str, None] = "e1a6b9c0d2f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATEGORIES = ["shadeTrees", "fruitTrees", "floweringShrubs", "vegetables", "herbs"]
+
+PLANT_FIELDS = {
+    "commonName": "common_name",
+    "botanicalName": "botanical_name",
+    "plantType": "plant_type",
+    "sunlightNeeds": "sunlight_needs",
+    "waterNeeds": "water_needs",
+    "matureSize": "mature_size",
+    "spacing": "spacing",
+}
+
+blobs = sa.table(
+    "garden_recommendations",
+    sa.column("garden_id", sa.Integer),
+    sa.column("data", sa.Text),
+)
+
+plants = sa.table(
+    "garden_recommended_plants",
+    sa.column("id", sa.Integer),
+    sa.column("garden_id", sa.Integer),
+    sa.column("category", sa.String),
+    *(
+        sa.column(column, sa.String)
+        for column in PLANT_FIELDS.values()
+        if column != "spacing"
+    ),
+    sa.column("spacing", sa.Float),
+)
+
+
+def _spacing(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "garden_recommended_plants",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "garden_id",
+            sa.Integer(),
+            sa.ForeignKey("gardens.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("category", sa.String(length=50), nullable=False),
+        sa.Column("common_name", sa.String(length=255), nullable=True),
+        sa.Column("botanical_name", sa.String(length=255), nullable=False),
+        sa.Column("plant_type", sa.String(length=100), nullable=True),
+        sa.Column("sunlight_needs", sa.String(length=255), nullable=True),
+        sa.Column("water_needs", sa.String(length=255), nullable=True),
+        sa.Column("mature_size", sa.String(length=255), nullable=True),
+        sa.Column("spacing", sa.Float(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint(
+            "garden_id",
+            "botanical_name",
+            name="uq_garden_recommended_plants_garden_id_botanical_name",
+        ),
+    )
+
+    conn = op.get_bind()
+    for garden_id, data in conn.execute(sa.select(blobs.c.garden_id, blobs.c.data)):
+        try:
+            recs = json.loads(data).get("recommendedPlants", {})
+        except (TypeError, ValueError, AttributeError):
+            continue
+        rows, seen = [], set()
+        for category in CATEGORIES:
+            for plant in recs.get(category) or []:
+                name = " ".join(str(plant.get("botanicalName") or "").split())
+                if not name or name in seen:
+                    continue
+                seen.add(name)
+                row = {
+                    column: plant.get(field) for field, column in PLANT_FIELDS.items()
+                }
+                row.update(
+                    garden_id=garden_id,
+                    category=category,
+                    botanical_name=name,
+                    spacing=_spacing(plant.get("spacing")),
+                )
+                rows.append(row)
+        if rows:
+            conn.execute(plants.insert(), rows)
+
+    op.drop_table("garden_recommendations")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "garden_recommendations",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "garden_id", sa.Integer(), sa.ForeignKey("gardens.id"), nullable=False
+        ),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()")
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_unique_constraint(
+        "uq_garden_recommendations_garden_id",
+        "garden_recommendations",
+        ["garden_id"],
+    )
+
+    conn = op.get_bind()
+    payloads = {}
+    for row in conn.execute(sa.select(plants).order_by(plants.c.id)).mappings():
+        recs = payloads.setdefault(
+            row["garden_id"], {category: [] for category in CATEGORIES}
+        )
+        recs.setdefault(row["category"], []).append(
+            {
+                field: row[column]
+                for field, column in PLANT_FIELDS.items()
+                if row[column] is not None
+            }
+        )
+    if payloads:
+        conn.execute(
+            blobs.insert(),
+            [
+                {
+                    "garden_id": garden_id,
+                    "data": json.dumps({"recommendedPlants": recs}),
+                }
+                for garden_id, recs in payloads.items()
+            ],
+        )
+
+    op.drop_table("garden_recommended_plants")
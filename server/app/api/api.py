@@ -1,10 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.api.routes.user import router as user_router
 from app.api.routes.garden import router as garden_router
+from app.services.llm_metrics import label_route
 
 api_router = APIRouter()
 
 # Include all routes here
 api_router.include_router(user_router, prefix="/users", tags=["users"])
-api_router.include_router(garden_router, prefix="/garden", tags=["garden"])
+# LLM call metrics are labelled with the route that made the call
+api_router.include_router(
+    garden_router,
+    prefix="/garden",
+    tags=["garden"],
+    dependencies=[Depends(label_route)],
+)
@@ -1,10 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, Any, List, Optional
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 import logging
 import json
-from app.services.gemini import gemini_service
+import math
+from app.services.gemini import GeminiBusyError, gemini_service
+from app.services.answer_cache import (
+    answer_cache,
+    answer_location,
+    remember_stream,
+    replay,
+)
+from app.services.recommendation_cache import cached_plant_recommendations
+from app.services.garden_recommendations import (
+    delete_recommendations,
+    load_recommendations,
+)
+from app.services.recommendation_jobs import enqueue_job, find_active_job
+from app.services.rate_limit import take_token
+from app.core.config import settings
+from app.services.spatial import elements_in_bbox, parse_bbox
+from app.services.spacing import garden_spacing_conflicts
+from app.services.garden_context import build_garden_context
+from app.services.garden_elements import (
+    ElementChangeSet,
+    apply_operations,
+    apply_snapshot,
+    record_element_changes,
+)
 from app.core.auth import get_current_user
 from app.schemas.user import User
 from app.schemas.garden import (
@@ -16,14 +44,22 @@ from app.schemas.garden import (
     GardenElementCreate,
     GardenElementUpdate,
     GardenSnapshot,
+    GardenSnapshotResult,
+    GardenElementBatch,
+    GardenElementBatchResult,
+    GardenChanges,
+    GardenBase,
+    SpacingConflictReport,
     GardenNote,
     GardenNoteCreate,
+    RecommendationJob,
 )
 from app.models.garden import (
     Garden as GardenModel,
     GardenElement as GardenElementModel,
     GardenNote as GardenNoteModel,
-    GardenRecommendation as GardenRecommendationModel,
+    GardenElementChange as GardenElementChangeModel,
+    RecommendationJob as RecommendationJobModel,
 )
 from app.db.session import get_db
 
@@ -32,6 +68,172 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+async def get_user_garden(
+    db: AsyncSession, garden_id: int, user_id: str, with_children: bool = False
+) -> Optional[GardenModel]:
+    """Fetch a garden owned by the given user, optionally with elements and notes"""
+    stmt = select(GardenModel).filter(
+        GardenModel.id == garden_id,
+        GardenModel.user_id == user_id,
+    )
+    if with_children:
+        stmt = stmt.options(
+            selectinload(GardenModel.elements),
+            selectinload(GardenModel.notes),
+        ).execution_options(populate_existing=True)
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+
+async def touch_garden(
+    db: AsyncSession,
+    garden_id: int,
+    changes: Optional[ElementChangeSet] = None,
+    element_total: Optional[int] = None,
+) -> int:
+    """
+    Record a change to a garden: bump its version (used for ETags and the
+    change feed), keep gardens.element_count in step with garden_elements and
+    log the touched element IDs. Pass ``element_total`` when the full element
+    set is known. Returns the new version.
+    """
+    values = {"version": GardenModel.version + 1}
+    if element_total is not None:
+        values["element_count"] = element_total
+    elif changes and changes.count_delta:
+        # NULL + n stays NULL, so unknown counts remain on the COUNT(*) fallback
+        values["element_count"] = GardenModel.element_count + changes.count_delta
+    result = await db.execute(
+        update(GardenModel)
+        .where(GardenModel.id == garden_id)
+        .values(**values)
+        .returning(GardenModel.version)
+        .execution_options(synchronize_session=False)
+    )
+    version = result.scalar_one()
+    if changes:
+        await record_element_changes(db, garden_id, version, changes)
+    return version
+
+
+def gemini_busy(e: GeminiBusyError) -> HTTPException:
+    """503 telling the client when to retry a call Gemini could not take"""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+async def check_rate_limit(user: User, bucket: str) -> None:
+    """Take one of the user's ``bucket`` tokens, or answer 429 with Retry-After"""
+    retry_after = await take_token(user.clerk_user_id, bucket)
+    if retry_after:
+        logger.info(f"Rate limited {user.clerk_user_id} on {bucket}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def rate_limited(bucket: str):
+    """Route dependency rate limiting the current user on ``bucket``"""
+
+    async def dependency(current_user: User = Depends(get_current_user)) -> None:
+        await check_rate_limit(current_user, bucket)
+
+    return dependency
+
+
+async def enqueue_charged_job(
+    db: AsyncSession,
+    user: User,
+    garden_id: int,
+    kind: str,
+    params: Dict[str, Any],
+) -> RecommendationJobModel:
+    """
+    Return the garden's identical active job, or take a "recommendations"
+    token and queue a new one: only new work counts against the limit, not
+    repeated clicks or serving stored plants
+    """
+    job = await find_active_job(db, garden_id, kind, params)
+    if job is not None:
+        return job
+    await check_rate_limit(user, "recommendations")
+    return await enqueue_job(db, garden_id, user.clerk_user_id, kind, params)
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def stream_answer(chunks: AsyncIterator[str], failure: str) -> StreamingResponse:
+    """
+    Serve an answer stream as Server-Sent Events: one ``data`` event per
+    chunk, then ``event: done``. The first chunk is awaited before responding
+    so a busy or failing Gemini still gets a proper 503/500 status; later
+    failures end the stream with ``event: error``.
+    """
+    try:
+        first = await anext(chunks, None)
+    except GeminiBusyError as e:
+        raise gemini_busy(e)
+    except Exception as e:
+        logger.error(f"{failure}: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"{failure}. Please try again later."
+        )
+
+    async def events():
+        try:
+            if first is not None:
+                yield sse_event({"text": first})
+            async for chunk in chunks:
+                yield sse_event({"text": chunk})
+            yield sse_event({}, event="done")
+        except Exception as e:
+            logger.error(f"{failure} mid-stream: {e}")
+            yield sse_event({"detail": failure}, event="error")
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def job_accepted(job: RecommendationJobModel) -> JSONResponse:
+    """202 Accepted pointing at the status endpoint of a queued job"""
+    return JSONResponse(
+        status_code=202,
+        content=RecommendationJob.model_validate(job).model_dump(mode="json"),
+        headers={
+            "Location": f"{settings.API_V1_STR}/garden/gardens/{job.garden_id}"
+            f"/recommendations/jobs/{job.id}"
+        },
+    )
+
+
+def garden_etag(garden_id: int, version: int) -> str:
+    return f'"garden-{garden_id}-v{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
 @router.get("/test")
 async def test_garden_endpoint():
     """Test endpoint to verify garden router is working"""
@@ -51,6 +253,9 @@ class PlantRecommendationResponse(BaseModel):
 
 class GardenQuestionRequest(BaseModel):
     question: str = Field(..., description="Gardening question to ask the assistant")
+    zip_code: Optional[str] = Field(
+        None, description="Asker's zip code, to answer for their climate zone"
+    )
 
 
 class GardenQuestionResponse(BaseModel):
@@ -58,12 +263,19 @@ class GardenQuestionResponse(BaseModel):
 
 
 # Plant recommendations endpoint (existing)
-@router.post("/plant-recommendations", response_model=PlantRecommendationResponse)
+@router.post(
+    "/plant-recommendations",
+    response_model=PlantRecommendationResponse,
+    dependencies=[Depends(rate_limited("recommendations"))],
+)
 async def get_plant_recommendations(
-    request: PlantRecommendationRequest, current_user: User = Depends(get_current_user)
+    request: PlantRecommendationRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get plant recommendations based on zip code using Gemini AI
+    Get plant recommendations based on zip code using Gemini AI, served from
+    the shared recommendation cache when the zip code has been seen before
     """
     try:
         # Validate zip code format (basic validation)
@@ -76,10 +288,9 @@ async def get_plant_recommendations(
             f"Getting plant recommendations for zip code: {request.zip_code} (user: {current_user.clerk_user_id})"
         )
 
-        # Get recommendations from Gemini
-        recommendations = await gemini_service.get_plant_recommendations(
-            request.zip_code
-        )
+        # Get recommendations from the cache, or Gemini on a miss
+        recommendations = await cached_plant_recommendations(db, request.zip_code)
+        await db.commit()
 
         # Persist as artifact per user's current zip code by garden (if exists)
         # We store per garden to avoid ambiguity; find or create garden for this zip code
@@ -91,6 +302,8 @@ async def get_plant_recommendations(
         )
         return return_data
 
+    except GeminiBusyError as e:
+        raise gemini_busy(e)
     except ValueError as e:
         logger.error(f"Validation error for zip code {request.zip_code}: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -113,33 +326,22 @@ class GardenRecommendationsResponse(BaseModel):
 async def get_garden_recommendations(
     garden_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
-    rec = (
-        db.query(GardenRecommendationModel)
-        .filter(GardenRecommendationModel.garden_id == garden_id)
-        .first()
-    )
+    data = await load_recommendations(db, garden_id)
 
-    if not rec:
+    if data is None:
         # No recommendations yet
         raise HTTPException(
             status_code=404, detail="No recommendations stored for this garden"
         )
 
-    return GardenRecommendationsResponse(garden_id=garden_id, data=json.loads(rec.data))
+    return GardenRecommendationsResponse(garden_id=garden_id, data=data)
 
 
 class GenerateGardenRecommendationsRequest(BaseModel):
@@ -147,57 +349,34 @@ class GenerateGardenRecommendationsRequest(BaseModel):
 
 
 @router.post(
-    "/gardens/{garden_id}/recommendations", response_model=GardenRecommendationsResponse
+    "/gardens/{garden_id}/recommendations",
+    response_model=GardenRecommendationsResponse,
+    responses={202: {"model": RecommendationJob}},
 )
 async def generate_garden_recommendations(
     garden_id: int,
     request: GenerateGardenRecommendationsRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    """
+    Return the garden's stored recommendations, or queue a job generating them
+    (always when ``force_refresh`` is set) and answer 202 with the job to poll
+    """
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
-    existing = (
-        db.query(GardenRecommendationModel)
-        .filter(GardenRecommendationModel.garden_id == garden_id)
-        .first()
-    )
-
-    if existing and not request.force_refresh:
-        return GardenRecommendationsResponse(
-            garden_id=garden_id, data=json.loads(existing.data)
-        )
+    if not request.force_refresh:
+        existing = await load_recommendations(db, garden_id)
+        if existing is not None:
+            return GardenRecommendationsResponse(garden_id=garden_id, data=existing)
 
-    try:
-        rec = await gemini_service.get_plant_recommendations(garden.zip_code)
-        payload = json.dumps(rec)
-
-        if existing:
-            existing.data = payload
-        else:
-            existing = GardenRecommendationModel(garden_id=garden_id, data=payload)
-            db.add(existing)
-        db.commit()
-        db.refresh(existing)
-        return GardenRecommendationsResponse(
-            garden_id=garden_id, data=json.loads(existing.data)
-        )
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed generating recommendations: {e}")
-        raise HTTPException(
-            status_code=500, detail="Failed to generate recommendations"
-        )
+    job = await enqueue_charged_job(
+        db, current_user, garden_id, "generate", request.model_dump()
+    )
+    return job_accepted(job)
 
 
 class MoreRecommendationsRequest(BaseModel):
@@ -207,107 +386,86 @@ class MoreRecommendationsRequest(BaseModel):
 
 @router.post(
     "/gardens/{garden_id}/recommendations/more",
-    response_model=GardenRecommendationsResponse,
+    status_code=202,
+    response_model=RecommendationJob,
 )
 async def request_more_recommendations(
     garden_id: int,
     request: MoreRecommendationsRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    """
+    Queue a job adding more recommendations to the garden's stored ones,
+    excluding plants already suggested. Poll the returned job for the result.
+    """
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
-    existing = (
-        db.query(GardenRecommendationModel)
-        .filter(GardenRecommendationModel.garden_id == garden_id)
-        .first()
+    job = await enqueue_charged_job(
+        db, current_user, garden_id, "more", request.model_dump()
     )
+    return job_accepted(job)
 
-    exclude = request.exclude_botanical_names
-    if not exclude and existing:
-        try:
-            existing_json = json.loads(existing.data)
-            # Flatten current botanical names to exclude
-            all_plants = []
-            recs = existing_json.get("recommendedPlants", {})
-            for key in [
-                "shadeTrees",
-                "fruitTrees",
-                "floweringShrubs",
-                "vegetables",
-                "herbs",
-            ]:
-                all_plants.extend(recs.get(key, []))
-            exclude = [
-                p.get("botanicalName") for p in all_plants if p.get("botanicalName")
-            ]
-        except Exception:
-            exclude = []
 
-    try:
-        more = await gemini_service.get_more_plant_recommendations(
-            garden.zip_code, exclude, request.count_per_category
+@router.get(
+    "/gardens/{garden_id}/recommendations/jobs/{job_id}",
+    response_model=RecommendationJob,
+)
+async def get_recommendation_job(
+    garden_id: int,
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Status of a recommendation job, with the garden's recommendations once it succeeded"""
+    job = (
+        await db.execute(
+            select(RecommendationJobModel).filter(
+                RecommendationJobModel.id == job_id,
+                RecommendationJobModel.garden_id == garden_id,
+                RecommendationJobModel.user_id == current_user.clerk_user_id,
+            )
         )
+    ).scalar_one_or_none()
 
-        # Merge with existing and upsert
-        merged = more
-        if existing:
-            try:
-                existing_json = json.loads(existing.data)
-                merged = {"recommendedPlants": {}}
-                categories = [
-                    "shadeTrees",
-                    "fruitTrees",
-                    "floweringShrubs",
-                    "vegetables",
-                    "herbs",
-                ]
-                for cat in categories:
-                    merged["recommendedPlants"][cat] = existing_json.get(
-                        "recommendedPlants", {}
-                    ).get(cat, []) + more.get("recommendedPlants", {}).get(cat, [])
-            except Exception:
-                merged = more
-
-        payload = json.dumps(merged)
-        if existing:
-            existing.data = payload
-        else:
-            existing = GardenRecommendationModel(garden_id=garden_id, data=payload)
-            db.add(existing)
-        db.commit()
-        db.refresh(existing)
-        return GardenRecommendationsResponse(
-            garden_id=garden_id, data=json.loads(existing.data)
-        )
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed getting more recommendations: {e}")
-        raise HTTPException(
-            status_code=500, detail="Failed to get more recommendations"
-        )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    status = RecommendationJob.model_validate(job)
+    if job.status == "succeeded":
+        status.result = await load_recommendations(db, garden_id)
+    return status
 
 
 # General gardening question endpoint
-@router.post("/ask", response_model=GardenQuestionResponse)
+@router.post(
+    "/ask",
+    response_model=GardenQuestionResponse,
+    dependencies=[Depends(rate_limited("ask"))],
+)
 async def ask_gardening_question(
     request: GardenQuestionRequest,
     current_user: User = Depends(get_current_user),
 ):
-    """Ask a general gardening question using Gemini AI"""
+    """
+    Ask a general gardening question using Gemini AI. Answers are cached per
+    climate zone, and near-identical questions share them.
+    """
+    location = answer_location(request.zip_code)
+    cached = answer_cache.get(request.question, location)
+    if cached is not None:
+        return GardenQuestionResponse(answer=cached)
     try:
-        answer = await gemini_service.ask_gardening_question(request.question)
+        answer = await gemini_service.ask_gardening_question(
+            request.question, request.zip_code
+        )
+        answer_cache.put(request.question, location, answer)
         return GardenQuestionResponse(answer=answer)
+    except GeminiBusyError as e:
+        raise gemini_busy(e)
     except Exception as e:
         logger.error(f"Error getting gardening advice: {e}")
         raise HTTPException(
@@ -316,6 +474,30 @@ async def ask_gardening_question(
         )
 
 
+@router.post("/ask/stream", dependencies=[Depends(rate_limited("ask"))])
+async def stream_gardening_question(
+    request: GardenQuestionRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Ask a general gardening question, streaming the answer as Server-Sent
+    Events. A cached answer is sent as a single chunk.
+    """
+    location = answer_location(request.zip_code)
+    cached = answer_cache.get(request.question, location)
+    if cached is not None:
+        chunks = replay(cached)
+    else:
+        chunks = remember_stream(
+            gemini_service.stream_gardening_question(
+                request.question, request.zip_code
+            ),
+            request.question,
+            location,
+        )
+    return await stream_answer(chunks, "Failed to get gardening advice")
+
+
 # Contextual gardening Q&A per garden
 class GardenContextQuestionRequest(BaseModel):
     question: str = Field(
@@ -323,93 +505,35 @@ class GardenContextQuestionRequest(BaseModel):
     )
 
 
-@router.post("/gardens/{garden_id}/ask", response_model=GardenQuestionResponse)
+@router.post(
+    "/gardens/{garden_id}/ask",
+    response_model=GardenQuestionResponse,
+    dependencies=[Depends(rate_limited("ask"))],
+)
 async def ask_gardening_question_with_context(
     garden_id: int,
     request: GardenContextQuestionRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Ask a gardening question using user's garden and location context."""
     # Verify garden ownership and load context
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
-    # Build lightweight garden context: metadata and elements summary
-    elements = (
-        db.query(GardenElementModel)
-        .filter(GardenElementModel.garden_id == garden_id)
-        .all()
-    )
-
-    def map_element(el: GardenElementModel) -> Dict[str, Any]:
-        base = {
-            "elementId": el.element_id,
-            "type": el.element_type,
-            "position": {"x": el.position_x, "y": el.position_y},
-        }
-        if el.element_type == "plant":
-            base.update(
-                {
-                    "commonName": el.common_name,
-                    "botanicalName": el.botanical_name,
-                    "plantType": el.plant_type,
-                    "sunlightNeeds": el.sunlight_needs,
-                    "waterNeeds": el.water_needs,
-                    "matureSize": el.mature_size,
-                    "spacing": el.spacing,
-                }
-            )
-        elif el.element_type == "structure":
-            base.update(
-                {
-                    "size": {"width": el.width, "height": el.height, "z": el.z_height},
-                    "label": el.label,
-                    "color": el.color,
-                    "shape": el.shape,
-                }
-            )
-        elif el.element_type == "text":
-            base.update(
-                {
-                    "text": el.text_content,
-                    "fontSize": el.font_size,
-                    "color": el.text_color,
-                }
-            )
-        return base
-
-    garden_context = {
-        "metadata": {
-            "name": garden.name,
-            "description": garden.description,
-            "zipCode": garden.zip_code,
-            "view": {
-                "x": garden.view_box_x,
-                "y": garden.view_box_y,
-                "width": garden.view_box_width,
-                "height": garden.view_box_height,
-                "zoom": garden.zoom,
-                "gridSize": garden.grid_size,
-            },
-        },
-        "elements": [map_element(el) for el in elements],
-    }
+    garden_context = await build_garden_context(db, garden)
+    # Nothing below needs the session; don't hold its connection during the call
+    await db.close()
 
     try:
         answer = await gemini_service.ask_contextual_gardening_question(
             request.question, garden.zip_code, garden_context
         )
         return GardenQuestionResponse(answer=answer)
+    except GeminiBusyError as e:
+        raise gemini_busy(e)
     except Exception as e:
         logger.error(f"Error getting contextual gardening advice: {e}")
         raise HTTPException(
@@ -418,48 +542,72 @@ async def ask_gardening_question_with_context(
         )
 
 
+@router.post(
+    "/gardens/{garden_id}/ask/stream",
+    dependencies=[Depends(rate_limited("ask"))],
+)
+async def stream_gardening_question_with_context(
+    garden_id: int,
+    request: GardenContextQuestionRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ask a question with garden context, streaming the answer as Server-Sent Events"""
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
+
+    if not garden:
+        raise HTTPException(status_code=404, detail="Garden not found")
+
+    garden_context = await build_garden_context(db, garden)
+    # Nothing below needs the session; don't hold its connection while streaming
+    await db.close()
+
+    return await stream_answer(
+        gemini_service.stream_contextual_gardening_question(
+            request.question, garden.zip_code, garden_context
+        ),
+        "Failed to get contextual gardening advice",
+    )
+
+
 # Garden CRUD endpoints
 @router.get("/gardens", response_model=List[GardenSummary])
 async def list_gardens(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
 ):
     """
     Get all gardens for the current user
     """
-    gardens = (
-        db.query(GardenModel)
-        .filter(GardenModel.user_id == current_user.clerk_user_id)
-        .all()
+    # Single round-trip: use the maintained element_count column, and only fall
+    # back to a correlated COUNT(*) for gardens where it is still NULL
+    counted = (
+        select(func.count(GardenElementModel.id))
+        .where(GardenElementModel.garden_id == GardenModel.id)
+        .correlate(GardenModel)
+        .scalar_subquery()
     )
-
-    # Add element count to each garden
-    garden_summaries = []
-    for garden in gardens:
-        element_count = (
-            db.query(GardenElementModel)
-            .filter(GardenElementModel.garden_id == garden.id)
-            .count()
-        )
-        garden_summaries.append(
-            GardenSummary(
-                id=garden.id,
-                name=garden.name,
-                description=garden.description,
-                zip_code=garden.zip_code,
-                created_at=garden.created_at,
-                updated_at=garden.updated_at,
-                element_count=element_count,
-            )
+    rows = await db.execute(
+        select(
+            GardenModel.id,
+            GardenModel.name,
+            GardenModel.description,
+            GardenModel.zip_code,
+            GardenModel.created_at,
+            GardenModel.updated_at,
+            func.coalesce(GardenModel.element_count, counted).label("element_count"),
         )
+        .filter(GardenModel.user_id == current_user.clerk_user_id)
+        .order_by(GardenModel.id)
+    )
 
-    return garden_summaries
+    return [GardenSummary.model_validate(row._mapping) for row in rows]
 
 
 @router.post("/gardens", response_model=Garden)
 async def create_garden(
     garden_data: GardenCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new garden
@@ -467,8 +615,10 @@ async def create_garden(
     garden = GardenModel(user_id=current_user.clerk_user_id, **garden_data.dict())
 
     db.add(garden)
-    db.commit()
-    db.refresh(garden)
+    await db.commit()
+    garden = await get_user_garden(
+        db, garden.id, current_user.clerk_user_id, with_children=True
+    )
 
     logger.info(f"Created garden {garden.id} for user {current_user.clerk_user_id}")
     return garden
@@ -477,24 +627,41 @@ async def create_garden(
 @router.get("/gardens/{garden_id}", response_model=Garden)
 async def get_garden(
     garden_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get a specific garden with all its elements
+    Get a specific garden with all its elements. Answers If-None-Match with
+    304 from the garden's version alone, without loading elements or notes.
     """
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
+    version = (
+        await db.execute(
+            select(GardenModel.version).filter(
+                GardenModel.id == garden_id,
+                GardenModel.user_id == current_user.clerk_user_id,
+            )
         )
-        .first()
+    ).scalar_one_or_none()
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Garden not found")
+
+    etag = garden_etag(garden_id, version)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    garden = await get_user_garden(
+        db, garden_id, current_user.clerk_user_id, with_children=True
     )
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
+    cache_headers["ETag"] = garden_etag(garden_id, garden.version)
+    response.headers.update(cache_headers)
     return garden
 
 
@@ -503,19 +670,12 @@ async def update_garden(
     garden_id: int,
     garden_update: GardenUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update garden metadata and view settings
     """
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
@@ -524,9 +684,12 @@ async def update_garden(
     update_data = garden_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(garden, field, value)
+    await touch_garden(db, garden_id)
 
-    db.commit()
-    db.refresh(garden)
+    await db.commit()
+    garden = await get_user_garden(
+        db, garden_id, current_user.clerk_user_id, with_children=True
+    )
 
     return garden
 
@@ -535,25 +698,31 @@ async def update_garden(
 async def delete_garden(
     garden_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a garden and all its elements
     """
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
-    db.delete(garden)
-    db.commit()
+    # Bulk-delete the change log, jobs and recommendations; SQLite does not
+    # enforce ON DELETE CASCADE
+    await db.execute(
+        delete(GardenElementChangeModel).where(
+            GardenElementChangeModel.garden_id == garden_id
+        )
+    )
+    await db.execute(
+        delete(RecommendationJobModel).where(
+            RecommendationJobModel.garden_id == garden_id
+        )
+    )
+    await delete_recommendations(db, garden_id)
+    await db.delete(garden)
+    await db.commit()
 
     logger.info(f"Deleted garden {garden_id} for user {current_user.clerk_user_id}")
     return {"message": "Garden deleted successfully"}
@@ -565,20 +734,13 @@ async def add_element(
     garden_id: int,
     element_data: GardenElementCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Add an element to a garden
     """
     # Verify garden ownership
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
@@ -586,42 +748,94 @@ async def add_element(
     element = GardenElementModel(garden_id=garden_id, **element_data.dict())
 
     db.add(element)
-    db.commit()
-    db.refresh(element)
+    await touch_garden(
+        db,
+        garden_id,
+        ElementChangeSet(inserted=1, upserted=[element.element_id]),
+    )
+    try:
+        await db.commit()
+    except IntegrityError:
+        # (garden_id, element_id) is unique
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Element {element_data.element_id} already exists in this garden",
+        )
+    await db.refresh(element)
 
     return element
 
 
+@router.get("/gardens/{garden_id}/elements", response_model=List[GardenElement])
+async def list_elements_in_viewport(
+    garden_id: int,
+    bbox: str = Query(..., description="Viewport as x0,y0,x1,y1 in canvas units"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the elements of a garden that intersect a viewport. Structures cover
+    width x height from their position; plants and text are points, so pad
+    the viewport by the largest spacing radius if circles must be included.
+    """
+    try:
+        viewport = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
+
+    if not garden:
+        raise HTTPException(status_code=404, detail="Garden not found")
+
+    return await elements_in_bbox(db, garden, viewport)
+
+
+@router.get(
+    "/gardens/{garden_id}/spacing-conflicts", response_model=SpacingConflictReport
+)
+async def get_spacing_conflicts(
+    garden_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get every pair of plants placed closer than their recommended spacing"""
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
+
+    if not garden:
+        raise HTTPException(status_code=404, detail="Garden not found")
+
+    return await garden_spacing_conflicts(db, garden)
+
+
 @router.put("/gardens/{garden_id}/elements/{element_id}", response_model=GardenElement)
 async def update_element(
     garden_id: int,
     element_id: str,
     element_update: GardenElementUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update a garden element
     """
     # Verify garden ownership
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
     element = (
-        db.query(GardenElementModel)
-        .filter(
-            GardenElementModel.garden_id == garden_id,
-            GardenElementModel.element_id == element_id,
+        (
+            await db.execute(
+                select(GardenElementModel).filter(
+                    GardenElementModel.garden_id == garden_id,
+                    GardenElementModel.element_id == element_id,
+                )
+            )
         )
+        .scalars()
         .first()
     )
 
@@ -632,9 +846,10 @@ async def update_element(
     update_data = element_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(element, field, value)
+    await touch_garden(db, garden_id, ElementChangeSet(upserted=[element_id]))
 
-    db.commit()
-    db.refresh(element)
+    await db.commit()
+    await db.refresh(element)
 
     return element
 
@@ -644,91 +859,191 @@ async def delete_element(
     garden_id: int,
     element_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a garden element
     """
     # Verify garden ownership
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
     element = (
-        db.query(GardenElementModel)
-        .filter(
-            GardenElementModel.garden_id == garden_id,
-            GardenElementModel.element_id == element_id,
+        (
+            await db.execute(
+                select(GardenElementModel).filter(
+                    GardenElementModel.garden_id == garden_id,
+                    GardenElementModel.element_id == element_id,
+                )
+            )
         )
+        .scalars()
         .first()
     )
 
     if not element:
         raise HTTPException(status_code=404, detail="Element not found")
 
-    db.delete(element)
-    db.commit()
+    await db.delete(element)
+    await touch_garden(db, garden_id, ElementChangeSet(deleted=[element_id]))
+    await db.commit()
 
     return {"message": "Element deleted successfully"}
 
 
-@router.post("/gardens/{garden_id}/save-snapshot")
+@router.get("/gardens/{garden_id}/changes", response_model=GardenChanges)
+async def get_garden_changes(
+    garden_id: int,
+    since: int = Query(..., ge=0, description="Last garden version the client has"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the elements upserted and the element IDs deleted after version
+    ``since``. Garden metadata is always included; notes are not.
+    """
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
+
+    if not garden:
+        raise HTTPException(status_code=404, detail="Garden not found")
+
+    upserted: List[GardenElementModel] = []
+    deleted: List[str] = []
+    if since < garden.version:
+        changed = select(GardenElementChangeModel.element_id).where(
+            GardenElementChangeModel.garden_id == garden_id,
+            GardenElementChangeModel.version > since,
+        )
+        upserted = (
+            (
+                await db.execute(
+                    select(GardenElementModel).where(
+                        GardenElementModel.garden_id == garden_id,
+                        GardenElementModel.element_id.in_(
+                            changed.where(GardenElementChangeModel.deleted.is_(False))
+                        ),
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        deleted = (
+            (
+                await db.execute(
+                    changed.where(GardenElementChangeModel.deleted.is_(True))
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    return GardenChanges(
+        garden_id=garden_id,
+        since=since,
+        version=garden.version,
+        garden=GardenBase.model_validate(garden, from_attributes=True),
+        upserted=upserted,
+        deleted=deleted,
+    )
+
+
+@router.post(
+    "/gardens/{garden_id}/elements/batch", response_model=GardenElementBatchResult
+)
+async def batch_element_operations(
+    garden_id: int,
+    batch: GardenElementBatch,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Apply an ordered list of element create/update/delete operations in a
+    single transaction (e.g. a multi-select drag)
+    """
+    # Verify garden ownership
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
+
+    if not garden:
+        raise HTTPException(status_code=404, detail="Garden not found")
+
+    try:
+        results, changes = await apply_operations(db, garden_id, batch.operations)
+        failed = sum(1 for result in results if result.status != "ok")
+        batch_result = GardenElementBatchResult(
+            applied=len(results) - failed, failed=failed, results=results
+        )
+
+        if failed and batch.atomic:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail=batch_result.model_dump())
+
+        if changes:
+            await touch_garden(db, garden_id, changes)
+        await db.commit()
+        return batch_result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error applying element batch: {e}")
+        raise HTTPException(status_code=500, detail="Failed to apply element batch")
+
+
+@router.post("/gardens/{garden_id}/save-snapshot", response_model=GardenSnapshotResult)
 async def save_garden_snapshot(
     garden_id: int,
     snapshot: GardenSnapshot,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Save a complete garden snapshot (bulk update)
+    Save a complete garden snapshot. Stored elements are diffed against the
+    snapshot by element_id so only changed rows are written.
     """
     # Verify garden ownership
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
     try:
         # Update garden metadata
+        metadata_changed = False
         if snapshot.garden:
             garden_update_data = snapshot.garden.dict(exclude_unset=True)
+            metadata_changed = any(
+                getattr(garden, field) != value
+                for field, value in garden_update_data.items()
+            )
             for field, value in garden_update_data.items():
                 setattr(garden, field, value)
 
-        # Clear existing elements and add new ones
-        db.query(GardenElementModel).filter(
-            GardenElementModel.garden_id == garden_id
-        ).delete()
-
-        # Add new elements
-        for element_data in snapshot.elements:
-            element = GardenElementModel(garden_id=garden_id, **element_data.dict())
-            db.add(element)
+        # Upsert new/changed elements and drop the ones no longer present
+        changes = await apply_snapshot(db, garden_id, snapshot.elements)
+        total = len({el.element_id for el in snapshot.elements})
+        if metadata_changed or changes:
+            await touch_garden(db, garden_id, changes, element_total=total)
 
-        db.commit()
+        await db.commit()
 
         logger.info(
-            f"Saved snapshot for garden {garden_id} with {len(snapshot.elements)} elements"
+            f"Saved snapshot for garden {garden_id} with {total} elements "
+            f"({changes.inserted} inserted, {changes.updated} updated, "
+            f"{len(changes.deleted)} deleted)"
+        )
+        return GardenSnapshotResult(
+            message="Garden snapshot saved successfully",
+            inserted=changes.inserted,
+            updated=changes.updated,
+            deleted=len(changes.deleted),
         )
-        return {"message": "Garden snapshot saved successfully"}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error saving garden snapshot: {e}")
         raise HTTPException(status_code=500, detail="Failed to save garden snapshot")
 
@@ -738,25 +1053,23 @@ async def save_garden_snapshot(
 async def list_notes(
     garden_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get all notes for a garden"""
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
     notes = (
-        db.query(GardenNoteModel)
-        .filter(GardenNoteModel.garden_id == garden_id)
-        .order_by(GardenNoteModel.created_at.desc())
+        (
+            await db.execute(
+                select(GardenNoteModel)
+                .filter(GardenNoteModel.garden_id == garden_id)
+                .order_by(GardenNoteModel.created_at.desc())
+            )
+        )
+        .scalars()
         .all()
     )
     return notes
@@ -767,23 +1080,17 @@ async def create_note(
     garden_id: int,
     note: GardenNoteCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a note for a garden"""
-    garden = (
-        db.query(GardenModel)
-        .filter(
-            GardenModel.id == garden_id,
-            GardenModel.user_id == current_user.clerk_user_id,
-        )
-        .first()
-    )
+    garden = await get_user_garden(db, garden_id, current_user.clerk_user_id)
 
     if not garden:
         raise HTTPException(status_code=404, detail="Garden not found")
 
     note_model = GardenNoteModel(garden_id=garden_id, content=note.content)
     db.add(note_model)
-    db.commit()
-    db.refresh(note_model)
+    await touch_garden(db, garden_id)
+    await db.commit()
+    await db.refresh(note_model)
     return note_model
@@ -6,7 +6,8 @@ import jwt
 from jwt import PyJWKClient
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.db.session import get_db
@@ -73,7 +74,7 @@ def validate_jwt(token: str) -> Dict:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     """
     Dependency to get the current user.
@@ -92,7 +93,8 @@ async def get_current_user(
         )
 
     # Check if user exists in our database
-    user = db.query(User).filter_by(clerk_user_id=user_id).first()
+    result = await db.execute(select(User).filter_by(clerk_user_id=user_id))
+    user = result.scalars().first()
 
     # If user does not exist, create them (Just-In-Time Provisioning)
     if not user:
@@ -142,8 +144,8 @@ async def get_current_user(
             # Create the user in our database
             user = User(clerk_user_id=user_id, email=email, name=name)
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             print(f"Created new user from Clerk: ID={user.id}, Email={user.email}")
 
         except httpx.HTTPStatusError as e:
@@ -157,12 +159,15 @@ async def get_current_user(
                 detail=f"Error fetching or creating user from Clerk: {str(e)}",
             )
 
+    # End the lookup's transaction so routes that go on to call slow services
+    # (Gemini) don't hold a pooled connection idle meanwhile
+    await db.commit()
     return user
 
 
 async def optional_current_user(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Optional[User]:
     """
     Dependency to optionally get the current user.
@@ -176,6 +181,7 @@ async def optional_current_user(
         uid = payload.get("sub")
         if not uid:
             return None
-        return db.query(User).filter_by(clerk_user_id=uid).first()
+        result = await db.execute(select(User).filter_by(clerk_user_id=uid))
+        return result.scalars().first()
     except HTTPException:
         return None
@@ -28,13 +28,101 @@ class Settings(BaseSettings):
     DB_PORT: Optional[str] = None
     DB_NAME: Optional[str] = None
 
+    # Database - Engine behaviour
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Run Base.metadata.create_all on startup (off by default; use Alembic)
+    DB_CREATE_TABLES: bool = False
+
     # Clerk Authentication
     CLERK_JWT_ISSUER: Optional[str] = None
     CLERK_AUDIENCE: Optional[str] = None
     CLERK_SECRET_KEY: Optional[str] = None
 
+    # LLM backend: "gemini", or "stub" for offline load tests and benchmarks
+    LLM_PROVIDER: str = "gemini"
+    # Stub provider: mean latency and its standard deviation (seconds), share
+    # of calls that fail, and the seed that makes a run reproducible
+    LLM_STUB_LATENCY: float = 1.5
+    LLM_STUB_LATENCY_JITTER: float = 0.5
+    LLM_STUB_ERROR_RATE: float = 0.0
+    LLM_STUB_SEED: int = 0
+
     # Gemini API
     GEMINI_API_KEY: Optional[str] = None
+    # Max in-flight Gemini calls per process, and how long (seconds) a request
+    # may wait for a free slot before getting a 503
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_QUEUE_TIMEOUT: float = 10.0
+    # Per-attempt timeout (seconds; also the longest gap between streamed
+    # chunks), total time a call may spend across retries and backoff, and
+    # how many times timeouts and retryable errors are retried. Backoff is
+    # drawn uniformly from 0 to GEMINI_RETRY_BACKOFF * 2^attempt.
+    GEMINI_CALL_TIMEOUT: float = 20.0
+    GEMINI_CALL_DEADLINE: float = 45.0
+    GEMINI_MAX_RETRIES: int = 2
+    GEMINI_RETRY_BACKOFF: float = 0.5
+    # Circuit breaker: consecutive failed attempts that open it, and seconds
+    # calls fail fast before a trial call is let through
+    GEMINI_BREAKER_FAILURES: int = 5
+    GEMINI_BREAKER_RESET: float = 30.0
+
+    # Shared plant recommendation cache: entry lifetime (seconds), entries kept
+    # in each process's LRU, and rows kept in the recommendation_cache table
+    RECOMMENDATION_CACHE_TTL: int = 7 * 24 * 60 * 60
+    RECOMMENDATION_CACHE_MEMORY_SIZE: int = 256
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = 10000
+    # How long (seconds) expired entries are kept to be served while Gemini is
+    # unavailable
+    RECOMMENDATION_CACHE_STALE_TTL: int = 30 * 24 * 60 * 60
+
+    # Per-process cache of answers to general gardening questions: entries,
+    # lifetime (seconds), and the TF-IDF cosine similarity at which a
+    # differently worded question counts as the same one
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIZE: int = 512
+    ANSWER_CACHE_TTL: int = 24 * 60 * 60
+    ANSWER_CACHE_SIMILARITY: float = 0.9
+
+    # Optional "zip,zone[,climate]" CSV refining the bundled per-prefix
+    # hardiness zones (app/data/zip3_climate_zones.csv) for single zip codes
+    CLIMATE_ZONE_FILE: Optional[str] = None
+
+    # Local plant catalog answering recommendations without Gemini: plants
+    # needed per category, and how many Gemini sightings in a region make a
+    # plant count for it (curated plants always count)
+    PLANT_CATALOG_ENABLED: bool = True
+    PLANT_CATALOG_PER_CATEGORY: int = 5
+    PLANT_CATALOG_MIN_SIGHTINGS: int = 1
+
+    # Per-user token buckets of the LLM endpoints, shared by all workers:
+    # requests allowed in a burst, and tokens refilled per minute. "ask"
+    # covers the question endpoints, "recommendations" the recommendation
+    # generating ones. A rate of 0 per minute blocks the group.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_ASK_BURST: int = 10
+    RATE_LIMIT_ASK_PER_MINUTE: float = 5.0
+    RATE_LIMIT_RECOMMENDATIONS_BURST: int = 5
+    RATE_LIMIT_RECOMMENDATIONS_PER_MINUTE: float = 2.0
+
+    # Coalescing of identical LLM requests across workers: how long (seconds) a
+    # request waits on another worker's in-flight call before making its own,
+    # and when an abandoned lock row may be taken over
+    SINGLE_FLIGHT_WAIT: float = 30.0
+    SINGLE_FLIGHT_LOCK_TTL: int = 120
+
+    # Approximate token budget for the garden summary in contextual Q&A prompts
+    GARDEN_CONTEXT_TOKEN_BUDGET: int = 1500
+
+    # Recommendation job queue: worker tasks per process (0 disables them),
+    # idle poll interval (seconds), attempts before a job fails, how long
+    # (seconds) a running job may go without finishing before it is requeued,
+    # and how often (seconds) each process sweeps for such jobs
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_STALE_AFTER: int = 300
+    JOB_STALE_SWEEP_INTERVAL: float = 60.0
 
     model_config = {
         "case_sensitive": True,
@@ -0,0 +1,15 @@
+from typing import Union
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+
+def insert_for(db: Union[AsyncSession, AsyncConnection], model):
+    """Dialect-specific INSERT construct that supports ON CONFLICT"""
+    bind = db.get_bind() if isinstance(db, AsyncSession) else db
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
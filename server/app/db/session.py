@@ -1,72 +1,114 @@
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+import asyncio
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from app.core.config import settings
 import logging
-from sqlalchemy.exc import ProgrammingError, OperationalError, SQLAlchemyError
+from sqlalchemy.exc import DBAPIError
 
 logger = logging.getLogger(__name__)
 
+# Engine and session factory are created per process by the app lifespan
+# (see app.main), never at import time, so forked workers don't share sockets.
+engine: Optional[AsyncEngine] = None
+SessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver"""
+    if database_url.startswith("postgres://"):
+        return database_url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("postgresql://") or database_url.startswith(
+        "postgresql+psycopg2://"
+    ):
+        return "postgresql+asyncpg://" + database_url.split("://", 1)[1]
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
+
+
+def _is_postgres(database_url: str) -> bool:
+    return "postgres" in database_url or "postgresql" in database_url
+
+
+def init_engine() -> AsyncEngine:
+    """Create the async engine and session factory for the current process"""
+    global engine, SessionLocal
+
+    if engine is not None:
+        return engine
+
+    # Get the database URL from settings
+    database_url = settings.get_database_url()
+
+    # Mask password for logging
+    masked_url = database_url
+    if settings.DB_PASSWORD:
+        masked_url = database_url.replace(settings.DB_PASSWORD, "****")
+    logger.info(f"Connecting to database at: {masked_url}")
+
+    # Configure engine based on database type. Connections are opened lazily
+    # on first use, so creating the engine does no I/O.
+    async_url = get_async_database_url(database_url)
+    if _is_postgres(database_url):
+        engine = create_async_engine(
+            async_url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+    else:
+        engine = create_async_engine(async_url)
+
+    # Create session factory. Objects stay usable after commit so that
+    # response models can be built without implicit (sync) reloads.
+    SessionLocal = async_sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    return engine
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections and forget the engine"""
+    global engine, SessionLocal
+
+    if engine is not None:
+        await engine.dispose()
+    engine = None
+    SessionLocal = None
 
-def initialize_database():
-    """Initialize the database connection and create tables"""
-    try:
-        # Get the database URL from settings
-        database_url = settings.get_database_url()
-
-        # Mask password for logging
-        masked_url = database_url
-        if settings.DB_PASSWORD:
-            masked_url = database_url.replace(settings.DB_PASSWORD, "****")
-        logger.info(f"Connecting to database at: {masked_url}")
-
-        # Configure engine based on database type
-        if "postgres" in database_url or "postgresql" in database_url:
-            engine = create_engine(
-                database_url,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,
-                poolclass=QueuePool,
-            )
-        else:
-            engine = create_engine(database_url)
-
-        # Create session factory
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-        # Test the connection
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-            logger.info("Database connection established successfully")
-
-        # Create tables
-        from app.models.models import User
-        from app.db.base_class import Base
-
-        # Create tables
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables initialized")
 
-        return engine, SessionLocal
+async def create_tables() -> None:
+    """Create missing tables. Only runs when DB_CREATE_TABLES is enabled."""
+    # Import models so they are registered on the metadata
+    import app.models  # noqa: F401
+    from app.db.base_class import Base
 
-    except (OperationalError, ProgrammingError) as e:
+    database_url = settings.get_database_url()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables initialized")
+    except DBAPIError as e:
         # Handle database doesn't exist case
-        if "does not exist" in str(e) and (
-            "postgres" in database_url or "postgresql" in database_url
-        ):
-            try:
-                create_postgres_database(database_url)
-                # Try initialization again after creating database
-                return initialize_database()
-            except Exception as db_create_error:
-                logger.error(f"Failed to create database: {db_create_error}")
-                raise
+        if "does not exist" in str(e) and _is_postgres(database_url):
+            await asyncio.to_thread(create_postgres_database, database_url)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            logger.info("Database tables initialized")
+            return
         logger.error(f"Database connection error: {e}")
         raise
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
-        raise
 
 
 def create_postgres_database(url):
@@ -90,17 +132,13 @@ def create_postgres_database(url):
             conn.execute(text("COMMIT"))
             conn.execute(text(f"CREATE DATABASE {db_name}"))
             logger.info(f"Created database {db_name}")
-
-
-# Initialize database connection and session factory
-engine, SessionLocal = initialize_database()
+    engine.dispose()
 
 
 # Dependency for routes
-def get_db():
-    """Dependency to get a database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session"""
+    if SessionLocal is None:
+        raise RuntimeError("Database engine is not initialized")
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,10 +1,16 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import logging
 
 from app.api.api import api_router
 from app.core.config import settings
+from app.db import session as db_session
+from app.services import llm_metrics
+from app.services.recommendation_jobs import JobWorkerPool
 
 # Import models to ensure they are registered with SQLAlchemy
 from app.models import models
@@ -14,24 +20,54 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-app = FastAPI(title="Fullstack Template API")
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # React dev server
-        "http://localhost:5173",  # Vite dev server
-        "http://127.0.0.1:3000",
-        "http://127.0.0.1:5173",
-    ],
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
-)
-
-# Include API router
-app.include_router(api_router, prefix=settings.API_V1_STR)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-process startup/shutdown. Runs inside each uvicorn worker after the
+    fork, so every worker gets its own engine and connection pool.
+    """
+    db_session.init_engine()
+    if settings.DB_CREATE_TABLES:
+        await db_session.create_tables()
+    job_workers = JobWorkerPool(settings.JOB_WORKERS)
+    if settings.JOB_WORKERS > 0:
+        job_workers.start()
+    try:
+        yield
+    finally:
+        await job_workers.stop()
+        await db_session.dispose_engine()
+        logger.info("Database engine disposed")
+
+
+def create_app() -> FastAPI:
+    """Application factory"""
+    app = FastAPI(title="Fullstack Template API", lifespan=lifespan)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",  # React dev server
+            "http://localhost:5173",  # Vite dev server
+            "http://127.0.0.1:3000",
+            "http://127.0.0.1:5173",
+        ],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "Location"],
+    )
+
+    # Include API router
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    return app
+
+
+app = create_app()
 
 
 # Example model
@@ -51,6 +87,14 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """LLM call histograms of this worker process (Prometheus text format)"""
+    return PlainTextResponse(
+        llm_metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/api/info")
 async def get_info():
     """Information about the backend stack"""
@@ -1,5 +1,30 @@
 from app.models.models import User
-from app.models.garden import Garden, GardenElement, GardenNote, GardenRecommendation
+from app.models.garden import (
+    Garden,
+    GardenElement,
+    GardenElementChange,
+    GardenNote,
+    GardenRecommendedPlant,
+    LLMRequestLock,
+    PlantCatalogEntry,
+    PlantCatalogRegion,
+    RateLimitBucket,
+    RecommendationCacheEntry,
+    RecommendationJob,
+)
 
 # Export models
-__all__ = ["User", "Garden", "GardenElement", "GardenNote", "GardenRecommendation"]
+__all__ = [
+    "User",
+    "Garden",
+    "GardenElement",
+    "GardenElementChange",
+    "GardenNote",
+    "GardenRecommendedPlant",
+    "LLMRequestLock",
+    "PlantCatalogEntry",
+    "PlantCatalogRegion",
+    "RateLimitBucket",
+    "RecommendationCacheEntry",
+    "RecommendationJob",
+]
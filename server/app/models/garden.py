@@ -7,6 +7,10 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Boolean,
+    Index,
+    DDL,
+    event,
+    literal_column,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -32,6 +36,13 @@ class Garden(Base):
     zoom = Column(Float, default=1.0)
     grid_size = Column(Integer, default=50)
 
+    # Denormalized number of garden_elements rows, kept in step by the element
+    # write routes. NULL means "unknown" and falls back to a COUNT(*).
+    element_count = Column(Integer, nullable=True, default=0)
+
+    # Bumped by every mutation of the garden, its elements or notes (ETag source)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -43,6 +54,12 @@ class Garden(Base):
     notes = relationship(
         "GardenNote", back_populates="garden", cascade="all, delete-orphan"
     )
+    # Rows are removed by the database (ON DELETE CASCADE), not loaded first
+    element_changes = relationship(
+        "GardenElementChange",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
 
 class GardenElement(Base):
@@ -87,6 +104,61 @@ class GardenElement(Base):
     # Relationships
     garden = relationship("Garden", back_populates="elements")
 
+    # Frontend element IDs are unique per garden; snapshot upserts rely on it.
+    # Viewport queries use the GiST index on (garden_id, element box), Postgres
+    # only; its expression must match app.services.spatial.element_box().
+    __table_args__ = (
+        UniqueConstraint(
+            "garden_id", "element_id", name="uq_garden_elements_garden_id_element_id"
+        ),
+        Index(
+            "ix_garden_elements_box",
+            garden_id,
+            func.box(
+                func.point(position_x, position_y),
+                func.point(
+                    position_x + func.coalesce(width, literal_column("0.0")),
+                    position_y + func.coalesce(height, literal_column("0.0")),
+                ),
+            ),
+            postgresql_using="gist",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# GiST indexes on a plain column need btree_gist
+event.listen(
+    GardenElement.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+
+
+class GardenElementChange(Base):
+    """
+    Compacted change log for the /changes feed: one row per element ID holding
+    the garden version that last upserted or deleted it.
+    """
+
+    __tablename__ = "garden_element_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    garden_id = Column(
+        Integer, ForeignKey("gardens.id", ondelete="CASCADE"), nullable=False
+    )
+    element_id = Column(String(255), nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "garden_id",
+            "element_id",
+            name="uq_garden_element_changes_garden_id_element_id",
+        ),
+        Index("ix_garden_element_changes_garden_id_version", "garden_id", "version"),
+    )
+
 
 class GardenNote(Base):
     __tablename__ = "garden_notes"
@@ -98,21 +170,182 @@ class GardenNote(Base):
 
     garden = relationship("Garden", back_populates="notes")
 
+    # Serves list_notes: WHERE garden_id = ? ORDER BY created_at DESC
+    __table_args__ = (
+        Index("ix_garden_notes_garden_id_created_at", "garden_id", created_at.desc()),
+    )
+
+
+class GardenRecommendedPlant(Base):
+    """
+    One recommended plant of a garden, in the order it was suggested. The
+    (garden_id, botanical_name) constraint keeps "more" requests from adding
+    a plant twice and serves their exclusion lists from the index.
+    """
+
+    __tablename__ = "garden_recommended_plants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    garden_id = Column(
+        Integer, ForeignKey("gardens.id", ondelete="CASCADE"), nullable=False
+    )
+    # recommendedPlants key: 'shadeTrees', 'fruitTrees', 'floweringShrubs', ...
+    category = Column(String(50), nullable=False)
+    common_name = Column(String(255), nullable=True)
+    botanical_name = Column(String(255), nullable=False)
+    plant_type = Column(String(100), nullable=True)
+    sunlight_needs = Column(String(255), nullable=True)
+    water_needs = Column(String(255), nullable=True)
+    mature_size = Column(String(255), nullable=True)
+    spacing = Column(Float, nullable=True)  # feet
+
+    __table_args__ = (
+        UniqueConstraint(
+            "garden_id",
+            "botanical_name",
+            name="uq_garden_recommended_plants_garden_id_botanical_name",
+        ),
+    )
+
+
+class PlantCatalogEntry(Base):
+    """
+    A plant known to the local catalog, filled from Gemini responses and
+    curated imports. Which regions it suits is kept in plant_catalog_regions.
+    """
+
+    __tablename__ = "plant_catalog"
+
+    id = Column(Integer, primary_key=True, index=True)
+    botanical_name = Column(String(255), nullable=False, unique=True)
+    category = Column(String(50), nullable=False)  # recommendedPlants key
+    common_name = Column(String(255), nullable=True)
+    plant_type = Column(String(100), nullable=True)
+    sunlight_needs = Column(String(255), nullable=True)
+    water_needs = Column(String(255), nullable=True)
+    mature_size = Column(String(255), nullable=True)
+    spacing = Column(Float, nullable=True)  # feet
+    curated = Column(Boolean, nullable=False, default=False)
+
+
+class PlantCatalogRegion(Base):
+    """
+    A catalog plant suiting a region, with how often Gemini recommended it
+    there. Curated rows are trusted regardless of ``seen_count``.
+    """
+
+    __tablename__ = "plant_catalog_regions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    plant_id = Column(
+        Integer, ForeignKey("plant_catalog.id", ondelete="CASCADE"), nullable=False
+    )
+    region = Column(String(50), nullable=False)
+    seen_count = Column(Integer, nullable=False, default=0)
+    curated = Column(Boolean, nullable=False, default=False)
+
+    plant = relationship("PlantCatalogEntry")
+
+    __table_args__ = (
+        # Leading region column serves the per-region lookups
+        UniqueConstraint(
+            "region", "plant_id", name="uq_plant_catalog_regions_region_plant_id"
+        ),
+    )
+
+
+class RecommendationCacheEntry(Base):
+    """
+    Shared recommendation payloads keyed by location (e.g. ``zone:7a-humid``,
+    or ``zip:12345`` when the zone is unknown) and
+    the prompt version that produced them. Rows past ``expires_at`` are never
+    served and are pruned on write together with the least recently used
+    rows beyond the configured size.
+    """
 
-class GardenRecommendation(Base):
-    __tablename__ = "garden_recommendations"
+    __tablename__ = "recommendation_cache"
 
     id = Column(Integer, primary_key=True, index=True)
-    garden_id = Column(Integer, ForeignKey("gardens.id"), nullable=False, unique=True)
-    # Store the full recommendation payload as JSON/Text
-    # Prefer JSONB if on Postgres, otherwise fallback to Text via SQLAlchemy JSON type resolution
-    # Use Text for maximum compatibility across SQLite/Postgres
+    cache_key = Column(String(255), nullable=False)
+    prompt_version = Column(String(32), nullable=False)
     data = Column(Text, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    garden = relationship("Garden")
+    __table_args__ = (
+        UniqueConstraint(
+            "cache_key",
+            "prompt_version",
+            name="uq_recommendation_cache_cache_key_prompt_version",
+        ),
+        Index("ix_recommendation_cache_last_used_at", "last_used_at"),
+    )
+
+
+class LLMRequestLock(Base):
+    """
+    Cross-worker lock rows for coalescing identical LLM requests. A row past
+    ``expires_at`` is abandoned and may be taken over.
+    """
+
+    __tablename__ = "llm_request_locks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lock_key = Column(String(255), nullable=False, unique=True)
+    owner = Column(String(64), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class RecommendationJob(Base):
+    """
+    Queued recommendation work for a garden, claimed by the in-process worker
+    pool of any API worker. ``params`` holds the JSON request body.
+    """
+
+    __tablename__ = "recommendation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    garden_id = Column(
+        Integer, ForeignKey("gardens.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = Column(String(255), nullable=False)  # Clerk user ID
+    kind = Column(String(20), nullable=False)  # 'generate', 'more'
+    # 'queued' -> 'running' -> 'succeeded' | 'failed'
+    status = Column(String(20), nullable=False, default="queued")
+    params = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    worker_id = Column(String(64), nullable=True)
+    # Not claimed before this time; set when requeued while Gemini is busy
+    available_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Claiming scans queued jobs oldest first; status pages look up by garden
+        Index("ix_recommendation_jobs_status_id", "status", "id"),
+        Index("ix_recommendation_jobs_garden_id", "garden_id"),
+    )
+
+
+class RateLimitBucket(Base):
+    """
+    Token bucket of one user for one group of LLM endpoints, shared by all
+    workers. ``tokens`` is the balance as of ``refilled_at``; the refill since
+    then is computed on the next take.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String(255), nullable=False)  # Clerk user ID
+    bucket = Column(String(50), nullable=False)  # 'ask', 'recommendations'
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(DateTime(timezone=True), nullable=False)
 
     __table_args__ = (
-        UniqueConstraint("garden_id", name="uq_garden_recommendations_garden_id"),
+        UniqueConstraint(
+            "user_id", "bucket", name="uq_rate_limit_buckets_user_id_bucket"
+        ),
     )
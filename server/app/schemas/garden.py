@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Union, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Union, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -103,6 +103,7 @@ class GardenUpdate(BaseModel):
 class Garden(GardenBase):
     id: int
     user_id: str
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     elements: List[GardenElement] = []
@@ -112,6 +113,15 @@ class Garden(GardenBase):
         from_attributes = True
 
 
+class GardenChanges(BaseModel):
+    garden_id: int
+    since: int
+    version: int
+    garden: GardenBase
+    upserted: List[GardenElement]
+    deleted: List[str]
+
+
 class GardenSummary(BaseModel):
     id: int
     name: str
@@ -153,6 +163,73 @@ class GardenSnapshot(BaseModel):
     elements: List[GardenElementCreate]
 
 
+class GardenElementCreateOperation(BaseModel):
+    op: Literal["create"]
+    element: GardenElementCreate
+
+
+class GardenElementUpdateOperation(BaseModel):
+    op: Literal["update"]
+    element_id: str
+    changes: GardenElementUpdate
+
+
+class GardenElementDeleteOperation(BaseModel):
+    op: Literal["delete"]
+    element_id: str
+
+
+GardenElementOperation = Annotated[
+    Union[
+        GardenElementCreateOperation,
+        GardenElementUpdateOperation,
+        GardenElementDeleteOperation,
+    ],
+    Field(discriminator="op"),
+]
+
+
+class GardenElementBatch(BaseModel):
+    operations: List[GardenElementOperation]
+    # Roll back every operation if any one of them fails
+    atomic: bool = False
+
+
+class GardenElementOperationResult(BaseModel):
+    index: int
+    op: str
+    element_id: str
+    status: str  # 'ok', 'not_found', 'conflict'
+    detail: Optional[str] = None
+
+
+class GardenElementBatchResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[GardenElementOperationResult]
+
+
+class GardenSnapshotResult(BaseModel):
+    message: str
+    inserted: int
+    updated: int
+    deleted: int
+
+
+# Spacing Schemas
+class SpacingConflict(BaseModel):
+    element_id_a: str
+    element_id_b: str
+    distance: float  # feet between plant centres
+    required_distance: float  # feet, half of each plant's spacing combined
+
+
+class SpacingConflictReport(BaseModel):
+    garden_id: int
+    plant_count: int
+    conflicts: List[SpacingConflict]
+
+
 # Recommendation Schemas
 class GardenRecommendationBase(BaseModel):
     data: Dict[str, Any]
@@ -166,3 +243,22 @@ class GardenRecommendation(GardenRecommendationBase):
 
     class Config:
         from_attributes = True
+
+
+class RecommendationJob(BaseModel):
+    """Status of a queued recommendation job; ``result`` is set once it succeeded"""
+
+    id: int
+    garden_id: int
+    kind: Literal["generate", "more"]
+    status: Literal["queued", "running", "succeeded", "failed"]
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    available_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
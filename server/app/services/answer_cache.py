@@ -0,0 +1,196 @@
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.climate_zones import location_key
+
+logger = logging.getLogger(__name__)
+
+# Hashed feature space of the TF-IDF vectors: 2048 float32 columns per entry
+FEATURES = 1 << 11
+GENERAL_LOCATION = "general"
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Filler words that don't change what a gardening question asks. Question
+# words (when, how, what, why, ...) and negations stay: they do.
+_STOPWORDS = frozenset(
+    """a about am an and any are at be can could did do does for i im in is it
+    its just me my of on or our please should so some the there these this
+    those to us we will with would you your""".split()
+)
+
+# (location, normalized question) of a cached answer
+AnswerKey = Tuple[str, str]
+
+
+def question_terms(question: str) -> List[str]:
+    """Lowercased, singularized words of a question without filler words"""
+    terms = []
+    for word in _WORD.findall(question.lower().replace("'", "")):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 4 and word.endswith("oes"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def answer_location(zip_code: Optional[str]) -> str:
+    """Location an answer is shared across: the zip's climate zone, or none"""
+    return location_key(zip_code) if zip_code else GENERAL_LOCATION
+
+
+def _features(terms: List[str]) -> np.ndarray:
+    """Hashed term counts of the words and word pairs of a question"""
+    counts = np.zeros(FEATURES, dtype=np.float32)
+    grams = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+    for gram in grams:
+        counts[zlib.crc32(gram.encode()) & (FEATURES - 1)] += 1
+    return counts
+
+
+class AnswerCache:
+    """
+    Per-process LRU of answers to general gardening questions, scoped by
+    location. A question hits when its normalized text matches a cached one
+    exactly, or when the TF-IDF cosine similarity of their words and word
+    pairs reaches ``threshold``. Entries live in rows of a fixed NumPy matrix
+    so a lookup is a single matrix-vector product.
+    """
+
+    def __init__(self, size: int, ttl: float, threshold: float):
+        self.size = size
+        self.ttl = ttl
+        self.threshold = threshold
+        # Least recently used first; values are matrix rows
+        self._rows: "OrderedDict[AnswerKey, int]" = OrderedDict()
+        self._keys: List[Optional[AnswerKey]] = [None] * size
+        self._answers: List[Optional[str]] = [None] * size
+        self._counts = np.zeros((size, FEATURES), dtype=np.float32)
+        self._doc_freq = np.zeros(FEATURES, dtype=np.float32)
+        self._expires = np.zeros(size, dtype=np.float64)
+        # Row location codes; -1 marks a free row
+        self._location = np.full(size, -1, dtype=np.int32)
+        self._location_codes: Dict[str, int] = {}
+        # TF-IDF rows (unit length), rebuilt lazily after entries change
+        self._weighted: Optional[np.ndarray] = None
+        self._idf: Optional[np.ndarray] = None
+
+    def _evict(self, key: AnswerKey) -> None:
+        row = self._rows.pop(key)
+        self._doc_freq -= self._counts[row] > 0
+        self._counts[row] = 0
+        self._keys[row] = None
+        self._answers[row] = None
+        self._location[row] = -1
+        self._weighted = None
+
+    def _reweigh(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._weighted is None:
+            entries = len(self._rows)
+            self._idf = (
+                np.log((1 + entries) / (1 + self._doc_freq)).astype(np.float32) + 1
+            )
+            weighted = self._counts * self._idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._weighted = weighted / np.maximum(norms, 1e-9)
+        return self._weighted, self._idf
+
+    def get(self, question: str, location: str) -> Optional[str]:
+        terms = question_terms(question)
+        if not terms or not self._rows:
+            return None
+        now = time.monotonic()
+        key = (location, " ".join(terms))
+
+        row = self._rows.get(key)
+        if row is None:
+            code = self._location_codes.get(location)
+            if code is None:
+                return None
+            weighted, idf = self._reweigh()
+            query = _features(terms) * idf
+            query /= max(float(np.linalg.norm(query)), 1e-9)
+            scores = weighted @ query
+            scores[(self._location != code) | (self._expires <= now)] = -1
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            row = best
+            key = self._keys[row]
+            logger.info(
+                f"Answer cache hit for {question!r} (similarity {scores[best]:.2f})"
+            )
+
+        if self._expires[row] <= now:
+            self._evict(key)
+            return None
+        self._rows.move_to_end(key)
+        return self._answers[row]
+
+    def put(self, question: str, location: str, answer: str) -> None:
+        terms = question_terms(question)
+        if not terms or not answer or self.size <= 0:
+            return
+        key = (location, " ".join(terms))
+        if key in self._rows:
+            self._evict(key)
+        # Reuse expired rows before dropping the least recently used answer
+        now = time.monotonic()
+        for stale in [k for k, r in self._rows.items() if self._expires[r] <= now]:
+            self._evict(stale)
+        if len(self._rows) >= self.size:
+            self._evict(next(iter(self._rows)))
+
+        row = int(np.flatnonzero(self._location == -1)[0])
+        counts = _features(terms)
+        self._counts[row] = counts
+        self._doc_freq += counts > 0
+        self._keys[row] = key
+        self._answers[row] = answer
+        self._expires[row] = now + self.ttl
+        self._location[row] = self._location_codes.setdefault(
+            location, len(self._location_codes)
+        )
+        self._rows[key] = row
+        self._weighted = None
+
+    def clear(self) -> None:
+        for key in list(self._rows):
+            self._evict(key)
+
+
+async def replay(answer: str) -> AsyncIterator[str]:
+    """A cached answer as a one-chunk stream"""
+    yield answer
+
+
+async def remember_stream(
+    chunks: AsyncIterator[str], question: str, location: str
+) -> AsyncIterator[str]:
+    """Pass a streamed answer through, caching it once it completes"""
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        await chunks.aclose()
+    answer_cache.put(question, location, "".join(parts).strip())
+
+
+answer_cache = AnswerCache(
+    size=settings.ANSWER_CACHE_SIZE if settings.ANSWER_CACHE_ENABLED else 0,
+    ttl=settings.ANSWER_CACHE_TTL,
+    threshold=settings.ANSWER_CACHE_SIMILARITY,
+)
@@ -0,0 +1,74 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised by ``CircuitBreaker.check`` while calls are being shed"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker for an upstream service. After ``failure_threshold``
+    consecutive failures it opens and rejects calls for ``reset_timeout``
+    seconds, then lets a single trial call through (half-open): its success
+    closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker next lets a call through"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead now"""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            logger.info(f"{self.name} circuit half-open, sending a trial call")
+            return
+        raise CircuitOpenError(self.name, self.retry_after() or self.reset_timeout)
+
+    def record_success(self) -> None:
+        if self._failures >= self.failure_threshold:
+            logger.info(f"{self.name} circuit closed")
+        self._failures = 0
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_running or self._failures == self.failure_threshold:
+            logger.warning(
+                f"{self.name} circuit opened after {self._failures} failures"
+                f" for {self.reset_timeout:g} s"
+            )
+            self._opened_at = time.monotonic()
+        self._trial_running = False
+
+    def record_abandoned(self) -> None:
+        """A call ended without telling anything about the upstream"""
+        self._trial_running = False
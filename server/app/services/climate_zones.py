@@ -0,0 +1,108 @@
+import csv
+import logging
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ZIP3_DATA_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "zip3_climate_zones.csv"
+)
+
+# Code 0 means unknown; zone codes index ZONES + 1, climate codes CLIMATES + 1
+ZONES = [f"{number}{half}" for number in range(1, 14) for half in "ab"]
+CLIMATES = [
+    "tropical",
+    "humid",
+    "semiarid",
+    "arid",
+    "mediterranean",
+    "marine",
+    "subarctic",
+]
+_ZONE_CODES = {zone: code for code, zone in enumerate(ZONES, start=1)}
+_CLIMATE_CODES = {climate: code for code, climate in enumerate(CLIMATES, start=1)}
+
+# (zone codes, climate codes), each indexed by the 5-digit zip as an integer
+_table: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+class ClimateZone(NamedTuple):
+    zone: str  # USDA hardiness zone, e.g. "7a"
+    climate: str  # broad climate, e.g. "humid"
+
+    @property
+    def key(self) -> str:
+        """Cache and catalog key shared by every zip code in the zone"""
+        return f"{self.zone}-{self.climate}"
+
+
+def _data_rows(path: str):
+    with open(path, newline="") as f:
+        yield from csv.reader(line for line in f if not line.startswith("#"))
+
+
+def _load_zip3(zones: np.ndarray, climates: np.ndarray) -> None:
+    """Fill all 100 zips of each prefix from the bundled prefix ranges"""
+    for row in _data_rows(ZIP3_DATA_FILE):
+        if row[0] == "first":
+            continue
+        first, last, zone, climate = row
+        span = slice(int(first) * 100, (int(last) + 1) * 100)
+        zones[span] = _ZONE_CODES[zone]
+        climates[span] = _CLIMATE_CODES[climate]
+
+
+def _load_zip5(path: str, zones: np.ndarray, climates: np.ndarray) -> int:
+    """Override single zips from a ``zip,zone[,climate]`` file"""
+    loaded = 0
+    for row in _data_rows(path):
+        if not row or not row[0].strip().isdigit():
+            continue  # header or blank line
+        index = int(row[0])
+        zone = row[1].strip().lower()
+        if zone not in _ZONE_CODES or not 0 <= index < len(zones):
+            continue
+        zones[index] = _ZONE_CODES[zone]
+        if len(row) > 2 and row[2].strip() in _CLIMATE_CODES:
+            climates[index] = _CLIMATE_CODES[row[2].strip()]
+        loaded += 1
+    return loaded
+
+
+def _lookup_table() -> Tuple[np.ndarray, np.ndarray]:
+    """Build the 100k-entry lookup arrays (~200 KB) on first use"""
+    global _table
+    if _table is None:
+        zones = np.zeros(100000, dtype=np.uint8)
+        climates = np.zeros(100000, dtype=np.uint8)
+        _load_zip3(zones, climates)
+        if settings.CLIMATE_ZONE_FILE:
+            loaded = _load_zip5(settings.CLIMATE_ZONE_FILE, zones, climates)
+            logger.info(
+                f"Loaded {loaded} zip code zones from {settings.CLIMATE_ZONE_FILE}"
+            )
+        _table = zones, climates
+    return _table
+
+
+def lookup_zone(zip_code: str) -> Optional[ClimateZone]:
+    """Hardiness zone and climate of a 5-digit zip code, or None if unknown"""
+    if not zip_code or len(zip_code) != 5 or not zip_code.isdigit():
+        return None
+    zones, climates = _lookup_table()
+    index = int(zip_code)
+    zone, climate = int(zones[index]), int(climates[index])
+    if not zone or not climate:
+        return None
+    return ClimateZone(ZONES[zone - 1], CLIMATES[climate - 1])
+
+
+def location_key(zip_code: str) -> str:
+    """``zone:<zone>-<climate>`` when the zone is known, else ``zip:<zip>``"""
+    zone = lookup_zone(zip_code)
+    return f"zone:{zone.key}" if zone else f"zip:{zip_code}"
@@ -0,0 +1,303 @@
+import json
+import logging
+import math
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.garden import (
+    Garden as GardenModel,
+    GardenElement as GardenElementModel,
+)
+from app.services.spacing import find_spacing_conflicts
+
+logger = logging.getLogger(__name__)
+
+# Gardens whose compacted context is kept in memory per process
+CONTEXT_CACHE_SIZE = 128
+
+# Plants within this many feet of each other (transitively) form one cluster
+CLUSTER_CELL_FEET = 10.0
+
+# Spacing conflicts listed individually; the rest are only counted
+MAX_LISTED_CONFLICTS = 10
+
+# Rough characters-per-token ratio of JSON for budgeting (no tokenizer needed)
+CHARS_PER_TOKEN = 4
+
+# Lists that may be shortened to fit the budget, least important first
+_TRIMMABLE = (
+    ("notes", None),
+    ("spacingIssues", "worst"),
+    ("clusters", None),
+    ("structures", None),
+    ("plants", None),
+)
+
+
+def estimate_tokens(context: Dict[str, Any]) -> int:
+    return math.ceil(len(dump_context(context)) / CHARS_PER_TOKEN)
+
+
+def dump_context(context: Dict[str, Any]) -> str:
+    """Compact JSON as sent in the prompt"""
+    return json.dumps(context, separators=(",", ":"))
+
+
+def _feet(value: float, grid_size: float) -> float:
+    return round(value / grid_size, 1)
+
+
+def _plant_summary(plants: List[GardenElementModel]) -> List[Dict[str, Any]]:
+    """One entry per distinct plant with its count, most numerous first"""
+    by_name: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for el in plants:
+        name = el.common_name or el.botanical_name or "Unknown plant"
+        entry = by_name.get(name)
+        if entry is None:
+            entry = by_name[name] = {
+                "name": name,
+                "botanicalName": el.botanical_name,
+                "type": el.plant_type,
+                "sun": el.sunlight_needs,
+                "water": el.water_needs,
+                "matureSize": el.mature_size,
+                "spacingFt": el.spacing,
+                "count": 0,
+            }
+        entry["count"] += 1
+    summary = sorted(by_name.values(), key=lambda entry: -entry["count"])
+    # Drop empty fields; they only cost tokens
+    return [{k: v for k, v in entry.items() if v is not None} for entry in summary]
+
+
+def _clusters(
+    plants: List[GardenElementModel], grid_size: float
+) -> List[Dict[str, Any]]:
+    """
+    Group plants into spatial clusters: bucket positions into
+    CLUSTER_CELL_FEET cells and join occupied neighbouring cells.
+    """
+    cell_size = CLUSTER_CELL_FEET * grid_size
+    cells: Dict[Tuple[int, int], List[GardenElementModel]] = {}
+    for el in plants:
+        key = (
+            math.floor(el.position_x / cell_size),
+            math.floor(el.position_y / cell_size),
+        )
+        cells.setdefault(key, []).append(el)
+
+    clusters: List[Dict[str, Any]] = []
+    seen = set()
+    for start in cells:
+        if start in seen:
+            continue
+        seen.add(start)
+        stack, members = [start], []
+        while stack:
+            cx, cy = stack.pop()
+            members.extend(cells[(cx, cy)])
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    neighbour = (cx + dx, cy + dy)
+                    if neighbour in cells and neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+
+        xs = [el.position_x for el in members]
+        ys = [el.position_y for el in members]
+        names = Counter(el.common_name or "Unknown plant" for el in members)
+        clusters.append(
+            {
+                "centerFt": [
+                    _feet(sum(xs) / len(xs), grid_size),
+                    _feet(sum(ys) / len(ys), grid_size),
+                ],
+                "extentFt": [
+                    _feet(max(xs) - min(xs), grid_size),
+                    _feet(max(ys) - min(ys), grid_size),
+                ],
+                "count": len(members),
+                "plants": dict(names.most_common(5)),
+            }
+        )
+    clusters.sort(key=lambda cluster: -cluster["count"])
+    return clusters
+
+
+def _structures(
+    structures: List[GardenElementModel], grid_size: float
+) -> List[Dict[str, Any]]:
+    """Structures tallest first, since height drives shading"""
+    summary = [
+        {
+            "label": el.label,
+            "shape": el.shape,
+            "positionFt": [
+                _feet(el.position_x, grid_size),
+                _feet(el.position_y, grid_size),
+            ],
+            "sizeFt": [
+                _feet(el.width or 0.0, grid_size),
+                _feet(el.height or 0.0, grid_size),
+            ],
+            "heightFt": el.z_height,
+        }
+        for el in sorted(structures, key=lambda el: -(el.z_height or 0.0))
+    ]
+    return [{k: v for k, v in entry.items() if v is not None} for entry in summary]
+
+
+def _spacing_issues(
+    plants: List[GardenElementModel], grid_size: float
+) -> Dict[str, Any]:
+    if len(plants) < 2:
+        return {"count": 0, "worst": []}
+    conflicts = find_spacing_conflicts(
+        [el.element_id for el in plants],
+        np.fromiter((el.position_x for el in plants), dtype=np.float64),
+        np.fromiter((el.position_y for el in plants), dtype=np.float64),
+        np.array([el.spacing for el in plants], dtype=np.float64),
+        grid_size,
+    )
+    names = {el.element_id: el.common_name or "Unknown plant" for el in plants}
+    return {
+        "count": len(conflicts),
+        "worst": [
+            {
+                "plants": [
+                    names[conflict["element_id_a"]],
+                    names[conflict["element_id_b"]],
+                ],
+                "distanceFt": round(conflict["distance"], 1),
+                "requiredFt": round(conflict["required_distance"], 1),
+            }
+            for conflict in conflicts[:MAX_LISTED_CONFLICTS]
+        ],
+    }
+
+
+def _shorten_description(garden: Dict[str, Any], excess_chars: int) -> None:
+    description = garden.get("description")
+    if not description:
+        return
+    keep = max(0, len(description) - excess_chars - len("..."))
+    garden["description"] = description[:keep].rstrip() + "..." if keep else None
+
+
+def fit_to_budget(context: Dict[str, Any], budget: int) -> Dict[str, Any]:
+    """
+    Halve the least important lists until the context fits ``budget`` tokens,
+    recording how many entries of each list were omitted. If that is not
+    enough, shorten the garden description and then halve the plant type
+    counts.
+    """
+    for key, inner in _TRIMMABLE:
+        while estimate_tokens(context) > budget:
+            holder = context[key] if inner else context
+            items = holder.get(inner or key)
+            if not items:
+                break
+            keep = len(items) // 2
+            holder[inner or key] = items[:keep]
+            omitted_key = f"{inner or key}Omitted"
+            holder[omitted_key] = holder.get(omitted_key, 0) + len(items) - keep
+
+    while estimate_tokens(context) > budget and context["garden"].get("description"):
+        excess = len(dump_context(context)) - budget * CHARS_PER_TOKEN
+        _shorten_description(context["garden"], excess)
+
+    totals = context["totals"]
+    while estimate_tokens(context) > budget and totals["plantsByType"]:
+        # Most common types first, so the halves dropped are the rarest
+        by_type = list(totals["plantsByType"].items())
+        keep = len(by_type) // 2
+        totals["plantsByType"] = dict(by_type[:keep])
+        totals["plantsByTypeOmitted"] = (
+            totals.get("plantsByTypeOmitted", 0) + len(by_type) - keep
+        )
+
+    tokens = estimate_tokens(context)
+    if tokens > budget:
+        logger.warning(
+            f"Garden context is ~{tokens} tokens after trimming, over the"
+            f" budget of {budget}"
+        )
+    return context
+
+
+def compact_garden_context(
+    garden: GardenModel, elements: List[GardenElementModel]
+) -> Dict[str, Any]:
+    """
+    Aggregate a garden into a prompt-sized summary: plant counts, spatial
+    clusters, structures with heights, labels and spacing issues, trimmed to
+    GARDEN_CONTEXT_TOKEN_BUDGET. Distances are in feet.
+    """
+    grid_size = float(garden.grid_size or 50)
+    plants = [el for el in elements if el.element_type == "plant"]
+    structures = [el for el in elements if el.element_type == "structure"]
+    notes = [
+        el.text_content
+        for el in elements
+        if el.element_type == "text" and el.text_content
+    ]
+
+    by_type = Counter(el.plant_type or "Other" for el in plants)
+    context: Dict[str, Any] = {
+        "garden": {
+            "name": garden.name,
+            "description": garden.description,
+            "zipCode": garden.zip_code,
+        },
+        "totals": {
+            "plants": len(plants),
+            "structures": len(structures),
+            "plantsByType": dict(by_type.most_common()),
+        },
+        "plants": _plant_summary(plants),
+        "clusters": _clusters(plants, grid_size),
+        "structures": _structures(structures, grid_size),
+        "spacingIssues": _spacing_issues(plants, grid_size),
+        "notes": notes,
+    }
+    return fit_to_budget(context, settings.GARDEN_CONTEXT_TOKEN_BUDGET)
+
+
+# garden_id -> (garden version, context), least recently used first
+_context_cache: "OrderedDict[int, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+
+
+async def build_garden_context(db: AsyncSession, garden: GardenModel) -> Dict[str, Any]:
+    """Compacted context for contextual Q&A, cached per garden version"""
+    cached = _context_cache.get(garden.id)
+    if cached and cached[0] == garden.version:
+        _context_cache.move_to_end(garden.id)
+        return cached[1]
+
+    elements = (
+        (
+            await db.execute(
+                select(GardenElementModel).where(
+                    GardenElementModel.garden_id == garden.id
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    context = compact_garden_context(garden, list(elements))
+    logger.info(
+        f"Built context for garden {garden.id} v{garden.version}: "
+        f"{len(elements)} elements, ~{estimate_tokens(context)} tokens"
+    )
+
+    _context_cache[garden.id] = (garden.version, context)
+    _context_cache.move_to_end(garden.id)
+    while len(_context_cache) > CONTEXT_CACHE_SIZE:
+        _context_cache.popitem(last=False)
+    return context
@@ -0,0 +1,243 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert_for
+from app.models.garden import (
+    GardenElement as GardenElementModel,
+    GardenElementChange as GardenElementChangeModel,
+)
+from app.schemas.garden import (
+    GardenElementBase,
+    GardenElementCreate,
+    GardenElementOperation,
+    GardenElementOperationResult,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns a client may write on a garden element (everything except keys/timestamps)
+ELEMENT_FIELDS: List[str] = list(GardenElementBase.model_fields.keys())
+
+# Rows per multi-row INSERT, keeps bind parameters well under driver limits
+UPSERT_CHUNK_SIZE = 500
+
+
+class ElementChangeSet(BaseModel):
+    """Element IDs written or removed by one request"""
+
+    inserted: int = 0
+    upserted: List[str] = []
+    deleted: List[str] = []
+
+    @property
+    def updated(self) -> int:
+        return len(self.upserted) - self.inserted
+
+    @property
+    def count_delta(self) -> int:
+        return self.inserted - len(self.deleted)
+
+    def __bool__(self) -> bool:
+        return bool(self.upserted or self.deleted)
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+async def upsert_elements(
+    db: AsyncSession, garden_id: int, rows: List[Dict[str, Any]]
+) -> None:
+    """
+    INSERT ... ON CONFLICT (garden_id, element_id) DO UPDATE for the given
+    element rows. Each row must carry every column in ELEMENT_FIELDS.
+    """
+    if not rows:
+        return
+
+    values = [{**row, "garden_id": garden_id} for row in rows]
+    for chunk in _chunks(values, UPSERT_CHUNK_SIZE):
+        stmt = insert_for(db, GardenElementModel).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["garden_id", "element_id"],
+            set_={
+                **{
+                    field: stmt.excluded[field]
+                    for field in ELEMENT_FIELDS
+                    if field != "element_id"
+                },
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+
+async def delete_elements(
+    db: AsyncSession, garden_id: int, element_ids: List[str]
+) -> List[str]:
+    """
+    Delete elements of a garden by frontend element_id in one statement.
+    Returns the element IDs that were actually removed.
+    """
+    if not element_ids:
+        return []
+    result = await db.execute(
+        delete(GardenElementModel)
+        .where(
+            GardenElementModel.garden_id == garden_id,
+            GardenElementModel.element_id.in_(element_ids),
+        )
+        .returning(GardenElementModel.element_id)
+    )
+    return list(result.scalars())
+
+
+async def record_element_changes(
+    db: AsyncSession, garden_id: int, version: int, changes: ElementChangeSet
+) -> None:
+    """Stamp the change log rows for the given element IDs with ``version``"""
+    rows = [
+        {"element_id": element_id, "deleted": False} for element_id in changes.upserted
+    ] + [{"element_id": element_id, "deleted": True} for element_id in changes.deleted]
+    if not rows:
+        return
+
+    values = [{**row, "garden_id": garden_id, "version": version} for row in rows]
+    for chunk in _chunks(values, UPSERT_CHUNK_SIZE):
+        stmt = insert_for(db, GardenElementChangeModel).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["garden_id", "element_id"],
+            set_={
+                "version": stmt.excluded.version,
+                "deleted": stmt.excluded.deleted,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+
+async def _load_elements(
+    db: AsyncSession, garden_id: int, element_ids: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Writable columns of a garden's elements keyed by element_id"""
+    columns = [getattr(GardenElementModel, field) for field in ELEMENT_FIELDS]
+    stmt = select(*columns).where(GardenElementModel.garden_id == garden_id)
+    if element_ids is not None:
+        stmt = stmt.where(GardenElementModel.element_id.in_(element_ids))
+    result = await db.execute(stmt)
+    return {row["element_id"]: dict(row) for row in result.mappings()}
+
+
+async def apply_snapshot(
+    db: AsyncSession, garden_id: int, elements: List[GardenElementCreate]
+) -> ElementChangeSet:
+    """
+    Reconcile stored elements with a full client snapshot. Only new or changed
+    rows are written and only missing rows are deleted.
+    """
+    stored = await _load_elements(db, garden_id)
+
+    # Later duplicates of an element_id win, matching client last-write order
+    incoming = {el.element_id: el.model_dump() for el in elements}
+
+    inserted = 0
+    changed: List[Dict[str, Any]] = []
+    for element_id, data in incoming.items():
+        current = stored.get(element_id)
+        if current is None:
+            inserted += 1
+            changed.append(data)
+        elif any(current[field] != data[field] for field in ELEMENT_FIELDS):
+            changed.append(data)
+
+    removed = [element_id for element_id in stored if element_id not in incoming]
+
+    await upsert_elements(db, garden_id, changed)
+    deleted = await delete_elements(db, garden_id, removed)
+
+    return ElementChangeSet(
+        inserted=inserted,
+        upserted=[row["element_id"] for row in changed],
+        deleted=deleted,
+    )
+
+
+async def apply_operations(
+    db: AsyncSession, garden_id: int, operations: List[GardenElementOperation]
+) -> Tuple[List[GardenElementOperationResult], ElementChangeSet]:
+    """
+    Apply an ordered list of create/update/delete operations. The operations
+    are replayed in memory against the touched rows (loaded with one SELECT),
+    then the final state is written with one upsert and one DELETE.
+
+    Returns the per-operation results and the resulting element changes.
+    """
+    touched = list(
+        {
+            op.element.element_id if op.op == "create" else op.element_id
+            for op in operations
+        }
+    )
+    stored = await _load_elements(db, garden_id, touched)
+
+    # element_id -> row dict, or None once deleted within this batch
+    state: Dict[str, Optional[Dict[str, Any]]] = dict(stored)
+    results: List[GardenElementOperationResult] = []
+
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            element_id = op.element.element_id
+            if state.get(element_id) is not None:
+                status, detail = "conflict", "Element already exists"
+            else:
+                state[element_id] = op.element.model_dump()
+                status, detail = "ok", None
+        else:
+            element_id = op.element_id
+            current = state.get(element_id)
+            if current is None:
+                status, detail = "not_found", "Element not found"
+            elif op.op == "update":
+                state[element_id] = {
+                    **current,
+                    **op.changes.model_dump(exclude_unset=True),
+                }
+                status, detail = "ok", None
+            else:
+                state[element_id] = None
+                status, detail = "ok", None
+
+        results.append(
+            GardenElementOperationResult(
+                index=index,
+                op=op.op,
+                element_id=element_id,
+                status=status,
+                detail=detail,
+            )
+        )
+
+    upserts = [
+        row
+        for element_id, row in state.items()
+        if row is not None and row != stored.get(element_id)
+    ]
+    removed = [
+        element_id
+        for element_id, row in state.items()
+        if row is None and element_id in stored
+    ]
+
+    await upsert_elements(db, garden_id, upserts)
+    deleted = await delete_elements(db, garden_id, removed)
+
+    return results, ElementChangeSet(
+        inserted=sum(1 for row in upserts if row["element_id"] not in stored),
+        upserted=[row["element_id"] for row in upserts],
+        deleted=deleted,
+    )
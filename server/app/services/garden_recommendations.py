@@ -0,0 +1,149 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert_for
+from app.models.garden import GardenRecommendedPlant as GardenRecommendedPlantModel
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_CATEGORIES = [
+    "shadeTrees",
+    "fruitTrees",
+    "floweringShrubs",
+    "vegetables",
+    "herbs",
+]
+
+# Payload field -> column of garden_recommended_plants
+_PLANT_FIELDS = {
+    "commonName": "common_name",
+    "botanicalName": "botanical_name",
+    "plantType": "plant_type",
+    "sunlightNeeds": "sunlight_needs",
+    "waterNeeds": "water_needs",
+    "matureSize": "mature_size",
+    "spacing": "spacing",
+}
+
+
+def _spacing(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def plant_entries(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flatten a recommendation payload into column dicts (plus ``category``) in
+    category order, dropping plants without a botanical name and repeats
+    within the payload.
+    """
+    recs = data.get("recommendedPlants", {})
+    entries: List[Dict[str, Any]] = []
+    seen = set()
+    for category in RECOMMENDATION_CATEGORIES:
+        for plant in recs.get(category) or []:
+            name = " ".join(str(plant.get("botanicalName") or "").split())
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            entry = {
+                column: plant.get(field)
+                for field, column in _PLANT_FIELDS.items()
+                if field != "spacing"
+            }
+            entry.update(
+                category=category,
+                botanical_name=name,
+                spacing=_spacing(plant.get("spacing")),
+            )
+            entries.append(entry)
+    return entries
+
+
+def plant_payload(plants) -> Dict[str, Any]:
+    """Recommendation payload from plant rows (anything with the plant columns)"""
+    recs: Dict[str, List[Dict[str, Any]]] = {
+        category: [] for category in RECOMMENDATION_CATEGORIES
+    }
+    for plant in plants:
+        entry = {
+            field: getattr(plant, column) for field, column in _PLANT_FIELDS.items()
+        }
+        recs.setdefault(plant.category, []).append(
+            {k: v for k, v in entry.items() if v is not None}
+        )
+    return {"recommendedPlants": recs}
+
+
+async def load_recommendations(
+    db: AsyncSession, garden_id: int
+) -> Optional[Dict[str, Any]]:
+    """The garden's recommendations as a payload, or None if it has none"""
+    plants = (
+        (
+            await db.execute(
+                select(GardenRecommendedPlantModel)
+                .where(GardenRecommendedPlantModel.garden_id == garden_id)
+                .order_by(GardenRecommendedPlantModel.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    return plant_payload(plants) if plants else None
+
+
+async def recommended_botanical_names(db: AsyncSession, garden_id: int) -> List[str]:
+    """Botanical names already recommended for the garden, oldest first"""
+    names = await db.scalars(
+        select(GardenRecommendedPlantModel.botanical_name)
+        .where(GardenRecommendedPlantModel.garden_id == garden_id)
+        .order_by(GardenRecommendedPlantModel.id)
+    )
+    return list(names)
+
+
+async def add_recommendations(
+    db: AsyncSession, garden_id: int, data: Dict[str, Any]
+) -> int:
+    """
+    Append the payload's plants to the garden's recommendations, skipping any
+    botanical name it already has. Returns the number of plants added. The
+    caller commits.
+    """
+    rows = [dict(entry, garden_id=garden_id) for entry in plant_entries(data)]
+    if not rows:
+        return 0
+    result = await db.execute(
+        insert_for(db, GardenRecommendedPlantModel)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["garden_id", "botanical_name"])
+    )
+    added = max(result.rowcount, 0)
+    if added < len(rows):
+        logger.info(
+            f"Skipped {len(rows) - added} already recommended plants "
+            f"for garden {garden_id}"
+        )
+    return added
+
+
+async def replace_recommendations(
+    db: AsyncSession, garden_id: int, data: Dict[str, Any]
+) -> int:
+    """Replace all of the garden's recommendations. The caller commits."""
+    await delete_recommendations(db, garden_id)
+    return await add_recommendations(db, garden_id, data)
+
+
+async def delete_recommendations(db: AsyncSession, garden_id: int) -> None:
+    await db.execute(
+        delete(GardenRecommendedPlantModel).where(
+            GardenRecommendedPlantModel.garden_id == garden_id
+        )
+    )
@@ -1,31 +1,263 @@
 # ===== File: server/app/services/gemini.py =====
-import google.generativeai as genai
+import asyncio
 import json
 import logging
-from typing import Dict, Any
+import random
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional
 from app.core.config import settings
+from app.services import llm_metrics
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.climate_zones import lookup_zone
+from app.services.llm_providers import LLMProvider, create_provider
 
 logger = logging.getLogger(__name__)
 
+# Upper bound (seconds) of the jittered backoff between retries
+RETRY_BACKOFF_CAP = 8.0
+
+
+class GeminiBusyError(Exception):
+    """Raised when no Gemini call slot frees up within the queue timeout"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Seconds the caller is told to wait before trying again
+        self.retry_after = (
+            settings.GEMINI_QUEUE_TIMEOUT if retry_after is None else retry_after
+        )
+
+
+class GeminiUnavailableError(GeminiBusyError):
+    """
+    Raised while the circuit breaker sheds calls, and when a call still fails
+    with retryable errors after its retries or deadline
+    """
+
 
 class GeminiService:
-    def __init__(self):
-        if not settings.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY environment variable is required")
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+    # Bump whenever the recommendation prompt or schema changes so cached
+    # payloads produced by the old prompt stop being served
+    RECOMMENDATIONS_PROMPT_VERSION = "2"
+
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        # Resolved from LLM_PROVIDER on first use, so importing this module
+        # never needs credentials
+        self._provider = provider
+        # Caps in-flight Gemini calls in this process
+        self._slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        # Fails calls fast in this process while Gemini keeps failing
+        self.breaker = CircuitBreaker(
+            "Gemini",
+            settings.GEMINI_BREAKER_FAILURES,
+            settings.GEMINI_BREAKER_RESET,
+        )
+
+    @property
+    def provider(self) -> LLMProvider:
+        if self._provider is None:
+            self._provider = create_provider()
+        return self._provider
+
+    @asynccontextmanager
+    async def _slot(self, call: llm_metrics.LLMCall):
+        """Wait (bounded by GEMINI_QUEUE_TIMEOUT) for a free call slot"""
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), timeout=settings.GEMINI_QUEUE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for a free Gemini call slot")
+            call.busy()
+            raise GeminiBusyError("Gemini is at capacity, try again shortly")
+        call.slot_acquired()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def _admit(self) -> None:
+        """Raise GeminiUnavailableError while the circuit breaker is open"""
+        try:
+            self.breaker.check()
+        except CircuitOpenError as e:
+            raise GeminiUnavailableError(
+                "Gemini is unavailable, try again shortly", retry_after=e.retry_after
+            )
+
+    def _retryable(self, error: Exception) -> bool:
+        return isinstance(error, asyncio.TimeoutError) or self.provider.is_retryable(
+            error
+        )
+
+    async def _backoff(
+        self, method: str, attempt: int, error: Exception, deadline: float
+    ):
+        """
+        Record a retryable failure and sleep before the next attempt, or raise
+        GeminiUnavailableError when retries, time or the breaker run out
+        """
+        self.breaker.record_failure()
+        delay = random.uniform(
+            0, min(RETRY_BACKOFF_CAP, settings.GEMINI_RETRY_BACKOFF * 2**attempt)
+        )
+        if (
+            attempt >= settings.GEMINI_MAX_RETRIES
+            or time.monotonic() + delay >= deadline
+        ):
+            logger.error(
+                f"Gemini {method} failed after {attempt + 1} attempts: {error!r}"
+            )
+            raise GeminiUnavailableError(
+                "Gemini is not responding, try again shortly",
+                retry_after=self.breaker.retry_after() or None,
+            ) from error
+        logger.warning(
+            f"Gemini {method} attempt {attempt + 1} failed ({error!r}),"
+            f" retrying in {delay:.2f} s"
+        )
+        await asyncio.sleep(delay)
+
+    async def _attempt(
+        self,
+        method: str,
+        prompt: str,
+        response_schema: Optional[Dict[str, Any]],
+        deadline: float,
+    ) -> Any:
+        """One provider call, cut off at GEMINI_CALL_TIMEOUT or the deadline"""
+        with llm_metrics.track(method, prompt) as call:
+            async with self._slot(call):
+                timeout = min(settings.GEMINI_CALL_TIMEOUT, deadline - time.monotonic())
+                text = await asyncio.wait_for(
+                    self.provider.generate(prompt, response_schema),
+                    timeout=max(timeout, 0),
+                )
+            call.responded(text)
+            if response_schema is None:
+                return text
+            with call.parsing():
+                try:
+                    return json.loads(text)
+                except json.JSONDecodeError:
+                    logger.error(f"Raw response: {text}")
+                    raise
+
+    async def _generate(
+        self,
+        method: str,
+        prompt: str,
+        response_schema: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Provider call limited by the call slots and measured under ``method``.
+        Returns the response text, or the parsed JSON when a schema is given.
+        Timeouts and retryable provider errors are retried with jittered
+        backoff within GEMINI_CALL_DEADLINE.
+        """
+        deadline = time.monotonic() + settings.GEMINI_CALL_DEADLINE
+        attempt = 0
+        while True:
+            self._admit()
+            try:
+                result = await self._attempt(method, prompt, response_schema, deadline)
+            except GeminiBusyError:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                if not self._retryable(e):
+                    # Gemini answered, just not usefully
+                    self.breaker.record_success()
+                    raise
+                await self._backoff(method, attempt, e, deadline)
+                attempt += 1
+            except BaseException:
+                self.breaker.record_abandoned()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _stream(self, method: str, prompt: str) -> AsyncIterator[str]:
+        """
+        Streaming provider call yielding text chunks as they arrive. The call
+        slot is held until the stream is exhausted or closed. Each chunk must
+        arrive within GEMINI_CALL_TIMEOUT; a stream failing before its first
+        chunk is retried like ``_generate``, one failing later is not.
+        """
+        deadline = time.monotonic() + settings.GEMINI_CALL_DEADLINE
+        attempt = 0
+        while True:
+            self._admit()
+            chunks = []
+            try:
+                with llm_metrics.track(method, prompt) as call:
+                    async with self._slot(call), aclosing(
+                        self.provider.stream(prompt)
+                    ) as stream:
+                        while True:
+                            timeout = settings.GEMINI_CALL_TIMEOUT
+                            if not chunks:
+                                timeout = min(timeout, deadline - time.monotonic())
+                            try:
+                                chunk = await asyncio.wait_for(
+                                    anext(stream), timeout=max(timeout, 0)
+                                )
+                            except StopAsyncIteration:
+                                break
+                            if not chunks:
+                                call.first_chunk()
+                                self.breaker.record_success()
+                            chunks.append(chunk)
+                            yield chunk
+                    call.responded("".join(chunks))
+            except GeminiBusyError:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                retryable = self._retryable(e)
+                if chunks:
+                    # Already answering; counts against the breaker, never retried
+                    if retryable:
+                        self.breaker.record_failure()
+                    raise
+                if not retryable:
+                    self.breaker.record_success()
+                    raise
+                await self._backoff(method, attempt, e, deadline)
+                attempt += 1
+            except BaseException:
+                self.breaker.record_abandoned()
+                raise
+            else:
+                if not chunks:
+                    self.breaker.record_success()
+                return
+
+    @staticmethod
+    def _recommendation_location(zip_code: str) -> str:
+        """
+        Location lines of the recommendation prompts: the zone and climate
+        when known, so every zip code in a zone sends the same prompt
+        """
+        zone = lookup_zone(zip_code)
+        if zone is None:
+            return f"- Zip Code: {zip_code}"
+        return f"- USDA Hardiness Zone: {zone.zone}\n- Climate: {zone.climate}"
 
     async def get_plant_recommendations(self, zip_code: str) -> Dict[str, Any]:
         """
-        Get plant recommendations from Gemini based on zip code
+        Get plant recommendations from Gemini for the zip code's climate zone
         """
+        location = self._recommendation_location(zip_code)
         prompt = f"""You are an expert horticulturalist and garden planner. Based on the user's location, your task is to recommend a variety of plants that will thrive in that specific climate and growing conditions.
 
 **User's Location:**
-- Zip Code: {zip_code}
+{location}
 
 **Your Task:**
-Using your knowledge of climate zones, growing conditions, and regional plant suitability for the provided zip code, provide a list of 5-7 plant recommendations for each of the following categories: "Shade Trees", "Fruit Trees", "Flowering Shrubs", "Vegetables", and "Herbs".
+Using your knowledge of climate zones, growing conditions, and regional plant suitability for the provided location, provide a list of 5-7 plant recommendations for each of the following categories: "Shade Trees", "Fruit Trees", "Flowering Shrubs", "Vegetables", and "Herbs".
 
 For each plant, you must provide the following details:
 - commonName: The common, everyday name of the plant.
@@ -79,41 +311,58 @@ Return your response as a single, valid JSON object that strictly follows the sc
         }
 
         try:
-            # Generate content with structured output
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json", response_schema=schema
-                ),
+            # Generate content with structured output, parsed from JSON
+            result = await self._generate(
+                "get_plant_recommendations", prompt, response_schema=schema
             )
-
-            # Parse the JSON response
-            result = json.loads(response.text)
             logger.info(
                 f"Successfully generated plant recommendations for zip code: {zip_code}"
             )
             return result
 
+        except GeminiBusyError:
+            raise
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response from Gemini: {e}")
-            raw_response = "N/A"
-            if hasattr(response, "text"):
-                raw_response = response.text
-            logger.error(f"Raw response: {raw_response}")
             raise ValueError("Invalid JSON response from Gemini API")
         except Exception as e:
             logger.error(f"Error calling Gemini API: {e}")
             raise ValueError(f"Failed to get plant recommendations: {str(e)}")
 
-    async def ask_gardening_question(self, question: str) -> str:
+    def _question_prompt(self, question: str, zip_code: Optional[str]) -> str:
+        """
+        A general question, preceded by the asker's zone and climate when a
+        zip code is given; like recommendations, the prompt is the same for
+        every zip code in a zone
+        """
+        if not zip_code:
+            return question
+        location = self._recommendation_location(zip_code)
+        return f"User's Location:\n{location}\n\nQuestion:\n{question}"
+
+    async def ask_gardening_question(
+        self, question: str, zip_code: Optional[str] = None
+    ) -> str:
         """Get a general gardening answer from Gemini"""
         try:
-            response = self.model.generate_content(question)
-            return response.text.strip()
+            response = await self._generate(
+                "ask_gardening_question", self._question_prompt(question, zip_code)
+            )
+            return response.strip()
+        except GeminiBusyError:
+            raise
         except Exception as e:
             logger.error(f"Error getting gardening advice from Gemini: {e}")
             raise ValueError("Failed to get gardening advice")
 
+    def stream_gardening_question(
+        self, question: str, zip_code: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream a general gardening answer from Gemini chunk by chunk"""
+        return self._stream(
+            "stream_gardening_question", self._question_prompt(question, zip_code)
+        )
+
     async def get_more_plant_recommendations(
         self,
         zip_code: str,
@@ -126,11 +375,12 @@ Return your response as a single, valid JSON object that strictly follows the sc
         exclusions = "\n".join(
             [f"- {name}" for name in already_suggested_botanical_names]
         )
+        location = self._recommendation_location(zip_code)
 
         prompt = f"""You are an expert horticulturalist and garden planner.
 
 User's Location:
-- Zip Code: {zip_code}
+{location}
 
 Task:
 Provide additional plant recommendations that would thrive in the above location.
@@ -183,21 +433,17 @@ Return a single valid JSON object exactly matching the schema below with no extr
         }
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json", response_schema=schema
-                ),
+            result = await self._generate(
+                "get_more_plant_recommendations", prompt, response_schema=schema
             )
-            result = json.loads(response.text)
             logger.info(
                 f"Successfully generated additional plant recommendations for zip code: {zip_code}"
             )
             return result
+        except GeminiBusyError:
+            raise
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response from Gemini (more): {e}")
-            raw_response = getattr(response, "text", "N/A")
-            logger.error(f"Raw response: {raw_response}")
             raise ValueError("Invalid JSON response from Gemini API")
         except Exception as e:
             logger.error(f"Error calling Gemini API (more): {e}")
@@ -205,19 +451,22 @@ Return a single valid JSON object exactly matching the schema below with no extr
                 f"Failed to get additional plant recommendations: {str(e)}"
             )
 
-    async def ask_contextual_gardening_question(
-        self, question: str, zip_code: str, garden_context: Dict[str, Any]
+    @staticmethod
+    def _contextual_prompt(
+        question: str, zip_code: str, garden_context: Dict[str, Any]
     ) -> str:
-        """Answer a gardening question using user's location and garden context."""
-        try:
-            summarized_context = json.dumps(garden_context, indent=2)
-            prompt = f"""
+        summarized_context = json.dumps(garden_context, separators=(",", ":"))
+        zone = lookup_zone(zip_code)
+        location = f"- Zip Code: {zip_code}"
+        if zone is not None:
+            location += f" (USDA zone {zone.zone}, {zone.climate} climate)"
+        return f"""
 You are an expert horticulturalist and garden planner. Answer the user's question with specific, actionable guidance.
 
 User's Location:
-- Zip Code: {zip_code}
+{location}
 
-User's Current Garden Context (JSON):
+User's Current Garden Summary (JSON; positions and distances in feet, plants grouped into clusters, "...Omitted" counts entries left out for brevity):
 {summarized_context}
 
 Question:
@@ -228,12 +477,30 @@ Guidelines:
 - Reference plants and structures already in the garden when relevant.
 - Be concise and practical. If recommending quantities or spacing, provide numbers.
 """
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+
+    async def ask_contextual_gardening_question(
+        self, question: str, zip_code: str, garden_context: Dict[str, Any]
+    ) -> str:
+        """Answer a gardening question using user's location and garden context."""
+        try:
+            prompt = self._contextual_prompt(question, zip_code, garden_context)
+            response = await self._generate("ask_contextual_gardening_question", prompt)
+            return response.strip()
+        except GeminiBusyError:
+            raise
         except Exception as e:
             logger.error(f"Error getting contextual gardening advice from Gemini: {e}")
             raise ValueError("Failed to get contextual gardening advice")
 
+    def stream_contextual_gardening_question(
+        self, question: str, zip_code: str, garden_context: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream a contextual gardening answer from Gemini chunk by chunk"""
+        return self._stream(
+            "stream_contextual_gardening_question",
+            self._contextual_prompt(question, zip_code, garden_context),
+        )
+
 
 # Singleton instance
 gemini_service = GeminiService()
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Request
+
+# Rough characters-per-token ratio of English prompts (no tokenizer needed)
+CHARS_PER_TOKEN = 4
+
+# Route (path template) or job kind that triggered the LLM call being measured
+current_route: ContextVar[str] = ContextVar("llm_route", default="none")
+
+SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+PARSE_SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+CHARS_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+TOKENS_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set, rendered in the Prometheus text
+    format. Only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Tuple[float, ...],
+        label_names: Tuple[str, ...],
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts, total = self._series.setdefault(
+            label_values, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        return {
+            labels: (list(counts), total[0])
+            for labels, (counts, total) in self._series.items()
+        }
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, (counts, total) in sorted(self.snapshot().items()):
+            labels = ",".join(
+                f"{name}={json.dumps(value)}"
+                for name, value in zip(self.label_names, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6g}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+_BY_CALL = ("method", "route")
+
+CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "Provider call time, excluding the wait for a call slot",
+    SECONDS_BUCKETS,
+    _BY_CALL + ("outcome",),
+)
+QUEUE_SECONDS = Histogram(
+    "llm_queue_wait_seconds",
+    "Time spent waiting for a call slot, by whether one was granted",
+    SECONDS_BUCKETS,
+    _BY_CALL + ("slot",),
+)
+FIRST_CHUNK_SECONDS = Histogram(
+    "llm_first_chunk_seconds",
+    "Time from the provider call to the first streamed chunk",
+    SECONDS_BUCKETS,
+    _BY_CALL,
+)
+PARSE_SECONDS = Histogram(
+    "llm_json_parse_seconds",
+    "Time spent parsing structured (JSON) responses",
+    PARSE_SECONDS_BUCKETS,
+    _BY_CALL,
+)
+PROMPT_CHARS = Histogram(
+    "llm_prompt_chars", "Prompt length in characters", CHARS_BUCKETS, _BY_CALL
+)
+PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    f"Prompt length in tokens, estimated at {CHARS_PER_TOKEN} characters per token",
+    TOKENS_BUCKETS,
+    _BY_CALL,
+)
+RESPONSE_CHARS = Histogram(
+    "llm_response_chars", "Response length in characters", CHARS_BUCKETS, _BY_CALL
+)
+
+HISTOGRAMS = (
+    CALL_SECONDS,
+    QUEUE_SECONDS,
+    FIRST_CHUNK_SECONDS,
+    PARSE_SECONDS,
+    PROMPT_CHARS,
+    PROMPT_TOKENS,
+    RESPONSE_CHARS,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class LLMCall:
+    """Measurements of one provider call, recorded when ``track`` exits"""
+
+    def __init__(self, method: str, prompt: str):
+        self.labels = (method, current_route.get())
+        self.outcome: Optional[str] = None
+        self._entered = time.perf_counter()
+        self._started: Optional[float] = None
+        self._ended: Optional[float] = None
+        PROMPT_CHARS.observe(len(prompt), *self.labels)
+        PROMPT_TOKENS.observe(estimate_tokens(prompt), *self.labels)
+
+    def slot_acquired(self) -> None:
+        """The call slot was granted; provider time starts now"""
+        self._started = time.perf_counter()
+        QUEUE_SECONDS.observe(self._started - self._entered, *self.labels, "granted")
+
+    def busy(self) -> None:
+        """No call slot freed up in time; the provider is never called"""
+        self.outcome = "busy"
+        QUEUE_SECONDS.observe(
+            time.perf_counter() - self._entered, *self.labels, "timed_out"
+        )
+
+    def first_chunk(self) -> None:
+        if self._started is not None:
+            FIRST_CHUNK_SECONDS.observe(
+                time.perf_counter() - self._started, *self.labels
+            )
+
+    def responded(self, text: str) -> None:
+        """The full response arrived; parsing it does not count as provider time"""
+        self._ended = time.perf_counter()
+        RESPONSE_CHARS.observe(len(text), *self.labels)
+
+    @contextmanager
+    def parsing(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            PARSE_SECONDS.observe(time.perf_counter() - start, *self.labels)
+
+    def _finish(self, outcome: str) -> None:
+        self.outcome = outcome
+        if self._started is not None:
+            ended = self._ended or time.perf_counter()
+            CALL_SECONDS.observe(ended - self._started, *self.labels, outcome)
+
+
+def _outcome(exc: BaseException) -> str:
+    if isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    if isinstance(exc, json.JSONDecodeError):
+        return "invalid_json"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+
+@contextmanager
+def track(method: str, prompt: str) -> Iterator[LLMCall]:
+    """
+    Measure one LLM call made inside the block: slot wait, provider time per
+    outcome, prompt and response sizes, and JSON parse time. Calls that never
+    got a slot are only counted in the queue wait and prompt histograms.
+    """
+    call = LLMCall(method, prompt)
+    try:
+        yield call
+    except BaseException as e:
+        call._finish(call.outcome or _outcome(e))
+        raise
+    call._finish("success")
+
+
+async def label_route(request: Request) -> None:
+    """Router dependency tagging LLM calls with the matched path template"""
+    route = request.scope.get("route")
+    current_route.set(getattr(route, "path", request.url.path))
+
+
+def render_prometheus() -> str:
+    """All LLM histograms of this process in the Prometheus text format"""
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProviderError(Exception):
+    """A provider call failed (transport, quota, or an injected stub error)"""
+
+
+class LLMProvider:
+    """
+    Text generation backend used by GeminiService. ``generate`` returns the
+    full response text; with ``response_schema`` (Gemini schema dialect) the
+    text must be JSON matching it. ``stream`` yields text chunks.
+    """
+
+    name = "base"
+
+    async def generate(
+        self, prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether a failed call may succeed when repeated"""
+        return isinstance(error, (LLMProviderError, ConnectionError))
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini via google.generativeai; configured on first use"""
+
+    name = "gemini"
+
+    # Rate limiting and server-side failures; bad requests are not retried
+    RETRYABLE_ERRORS = (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.DeadlineExceeded,
+    )
+
+    def __init__(self, model_name: str = "gemini-1.5-flash"):
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY environment variable is required")
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(
+        self, prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        kwargs = {}
+        if response_schema is not None:
+            kwargs["generation_config"] = genai.GenerationConfig(
+                response_mime_type="application/json", response_schema=response_schema
+            )
+        response = await self.model.generate_content_async(prompt, **kwargs)
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, self.RETRYABLE_ERRORS) or super().is_retryable(error)
+
+
+# (commonName, botanicalName, sunlightNeeds, waterNeeds, matureSize, spacing)
+_StubPlant = Tuple[str, str, str, str, str, float]
+
+# fmt: off
+STUB_PLANTS: Dict[str, List[_StubPlant]] = {
+    "shadeTrees": [
+        ("Red Maple", "Acer rubrum", "Full Sun", "Moderate", "40-60 ft tall, 30-50 ft wide", 35),
+        ("Pin Oak", "Quercus palustris", "Full Sun", "Moderate", "60-70 ft tall, 25-40 ft wide", 40),
+        ("Honeylocust", "Gleditsia triacanthos", "Full Sun", "Drought tolerant once established", "30-70 ft tall, 30-70 ft wide", 35),
+        ("River Birch", "Betula nigra", "Full Sun to Partial Shade", "Consistent moisture", "40-70 ft tall, 40-60 ft wide", 30),
+        ("Tulip Tree", "Liriodendron tulipifera", "Full Sun", "Moderate", "70-90 ft tall, 35-50 ft wide", 40),
+        ("Littleleaf Linden", "Tilia cordata", "Full Sun to Partial Shade", "Moderate", "50-70 ft tall, 35-50 ft wide", 35),
+        ("Ginkgo", "Ginkgo biloba", "Full Sun", "Moderate", "50-80 ft tall, 30-40 ft wide", 30),
+    ],
+    "fruitTrees": [
+        ("Apple", "Malus domestica", "Full Sun", "Moderate", "15-20 ft tall, 15 ft wide", 15),
+        ("Pear", "Pyrus communis", "Full Sun", "Moderate", "15-20 ft tall, 12 ft wide", 15),
+        ("Sweet Cherry", "Prunus avium", "Full Sun", "Moderate", "20-30 ft tall, 20 ft wide", 20),
+        ("Peach", "Prunus persica", "Full Sun", "Moderate", "15-25 ft tall, 15 ft wide", 15),
+        ("American Persimmon", "Diospyros virginiana", "Full Sun", "Drought tolerant once established", "20-35 ft tall, 15-20 ft wide", 20),
+        ("Fig", "Ficus carica", "Full Sun", "Moderate", "10-30 ft tall, 10-20 ft wide", 15),
+        ("European Plum", "Prunus domestica", "Full Sun", "Moderate", "15-20 ft tall, 15 ft wide", 15),
+    ],
+    "floweringShrubs": [
+        ("Bigleaf Hydrangea", "Hydrangea macrophylla", "Partial Shade", "Consistent moisture", "3-6 ft tall, 3-6 ft wide", 5),
+        ("Common Lilac", "Syringa vulgaris", "Full Sun", "Moderate", "8-15 ft tall, 6-12 ft wide", 8),
+        ("Rose of Sharon", "Hibiscus syriacus", "Full Sun", "Moderate", "8-12 ft tall, 6-10 ft wide", 6),
+        ("Butterfly Bush", "Buddleja davidii", "Full Sun", "Drought tolerant once established", "6-10 ft tall, 4-8 ft wide", 5),
+        ("Virginia Sweetspire", "Itea virginica", "Full Sun to Partial Shade", "Consistent moisture", "3-5 ft tall, 4-6 ft wide", 4),
+        ("Forsythia", "Forsythia x intermedia", "Full Sun", "Moderate", "8-10 ft tall, 10-12 ft wide", 8),
+        ("Azalea", "Rhododendron spp.", "Partial Shade", "Consistent moisture", "3-6 ft tall, 3-6 ft wide", 4),
+    ],
+    "vegetables": [
+        ("Tomato", "Solanum lycopersicum", "Full Sun", "Consistent moisture", "3-6 ft tall, 2 ft wide", 2),
+        ("Bell Pepper", "Capsicum annuum", "Full Sun", "Consistent moisture", "2-3 ft tall, 1.5 ft wide", 1.5),
+        ("Zucchini", "Cucurbita pepo", "Full Sun", "Consistent moisture", "2-3 ft tall, 3-4 ft wide", 3),
+        ("Lettuce", "Lactuca sativa", "Partial Shade", "Consistent moisture", "6-12 in tall, 8-12 in wide", 1),
+        ("Bush Bean", "Phaseolus vulgaris", "Full Sun", "Moderate", "1-2 ft tall, 1 ft wide", 0.5),
+        ("Carrot", "Daucus carota subsp. sativus", "Full Sun", "Moderate", "1 ft tall, 3 in wide", 0.25),
+        ("Kale", "Brassica oleracea var. sabellica", "Full Sun to Partial Shade", "Moderate", "1-2 ft tall, 1-2 ft wide", 1.5),
+    ],
+    "herbs": [
+        ("Basil", "Ocimum basilicum", "Full Sun", "Moderate", "1-2 ft tall, 1 ft wide", 1),
+        ("Rosemary", "Salvia rosmarinus", "Full Sun", "Drought tolerant once established", "2-4 ft tall, 2-4 ft wide", 2),
+        ("Thyme", "Thymus vulgaris", "Full Sun", "Drought tolerant once established", "6-12 in tall, 1 ft wide", 1),
+        ("Parsley", "Petroselinum crispum", "Full Sun to Partial Shade", "Moderate", "1 ft tall, 1 ft wide", 0.75),
+        ("Chives", "Allium schoenoprasum", "Full Sun", "Moderate", "1 ft tall, 1 ft wide", 0.75),
+        ("Sage", "Salvia officinalis", "Full Sun", "Drought tolerant once established", "2 ft tall, 2 ft wide", 1.5),
+        ("Mint", "Mentha spicata", "Partial Shade", "Consistent moisture", "1-2 ft tall, spreading", 2),
+    ],
+}
+# fmt: on
+
+_STUB_PLANT_TYPES = {
+    "shadeTrees": "Shade Tree",
+    "fruitTrees": "Fruit Tree",
+    "floweringShrubs": "Flowering Shrub",
+    "vegetables": "Vegetable",
+    "herbs": "Herb",
+}
+
+_STUB_SENTENCES = [
+    "Group plants with similar water needs so one irrigation zone serves them all.",
+    "Mulch two to three inches deep to hold moisture and suppress weeds.",
+    "Give fruiting vegetables at least six hours of direct sun.",
+    "Check the mature width on the tag and leave that spacing between plants.",
+    "Plant taller crops on the north side so they don't shade shorter ones.",
+    "Water deeply and less often to encourage deep roots.",
+    "Amend heavy soil with compost before planting rather than after.",
+    "Rotate vegetable families between beds each year to limit soil-borne disease.",
+]
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline provider for load tests and benchmarks. Content is deterministic
+    per prompt; latency and injected failures come from a seeded generator so
+    a run is reproducible. Recommendation responses follow the requested
+    schema, skip plants named in the prompt and honour "exactly N".
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency: Optional[float] = None,
+        jitter: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = settings.LLM_STUB_LATENCY if latency is None else latency
+        self.jitter = settings.LLM_STUB_LATENCY_JITTER if jitter is None else jitter
+        self.error_rate = (
+            settings.LLM_STUB_ERROR_RATE if error_rate is None else error_rate
+        )
+        self._timing = random.Random(settings.LLM_STUB_SEED if seed is None else seed)
+
+    def _draw(self) -> Tuple[float, bool]:
+        """Latency (seconds) and whether to fail, for one call"""
+        latency = max(0.0, self._timing.gauss(self.latency, self.jitter))
+        return latency, self._timing.random() < self.error_rate
+
+    @staticmethod
+    def _content_rng(prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _fake(self, schema: Dict[str, Any], prompt: str, rng, key=None) -> Any:
+        kind = schema.get("type", "STRING").upper()
+        if kind == "OBJECT":
+            return {
+                name: self._fake(sub, prompt, rng, name)
+                for name, sub in schema.get("properties", {}).items()
+            }
+        if kind == "ARRAY":
+            if key in STUB_PLANTS:
+                return self._plants(key, schema.get("items", {}), prompt, rng)
+            return [self._fake(schema.get("items", {}), prompt, rng) for _ in range(3)]
+        if kind in ("NUMBER", "INTEGER"):
+            value = rng.uniform(1, 10)
+            return round(value, 1) if kind == "NUMBER" else int(value)
+        if kind == "BOOLEAN":
+            return rng.random() < 0.5
+        return f"stub {key or 'value'}"
+
+    def _plants(
+        self, category: str, item_schema: Dict[str, Any], prompt: str, rng
+    ) -> List[Dict[str, Any]]:
+        exactly = re.search(r"exactly (\d+)", prompt)
+        count = int(exactly.group(1)) if exactly else 5
+        candidates = [
+            plant for plant in STUB_PLANTS[category] if plant[1] not in prompt
+        ]
+        rng.shuffle(candidates)
+        fields = item_schema.get("properties", {})
+        plants = []
+        for common, botanical, sun, water, size, spacing in candidates[:count]:
+            known = {
+                "commonName": common,
+                "botanicalName": botanical,
+                "plantType": _STUB_PLANT_TYPES[category],
+                "sunlightNeeds": sun,
+                "waterNeeds": water,
+                "matureSize": size,
+                "spacing": spacing,
+            }
+            plants.append(
+                {
+                    name: (
+                        known[name]
+                        if name in known
+                        else self._fake(sub, prompt, rng, name)
+                    )
+                    for name, sub in fields.items()
+                }
+            )
+        return plants
+
+    def _answer(self, prompt: str) -> str:
+        rng = self._content_rng(prompt)
+        return " ".join(rng.sample(_STUB_SENTENCES, k=4))
+
+    async def generate(
+        self, prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        latency, fail = self._draw()
+        await asyncio.sleep(latency)
+        if fail:
+            raise LLMProviderError("Injected stub provider failure")
+        if response_schema is None:
+            return self._answer(prompt)
+        return json.dumps(
+            self._fake(response_schema, prompt, self._content_rng(prompt))
+        )
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        latency, fail = self._draw()
+        words = self._answer(prompt).split(" ")
+        # First token after a fifth of the latency, the rest spread evenly
+        await asyncio.sleep(latency * 0.2)
+        step = latency * 0.8 / max(len(words) - 1, 1)
+        for index, word in enumerate(words):
+            if fail and index == len(words) // 2:
+                raise LLMProviderError("Injected stub provider failure")
+            if index:
+                await asyncio.sleep(step)
+            yield word if index == 0 else f" {word}"
+
+
+_PROVIDERS = {"gemini": GeminiProvider, "stub": StubProvider}
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """Build the provider named by LLM_PROVIDER (or ``name``)"""
+    name = (name or settings.LLM_PROVIDER).lower()
+    try:
+        provider_class = _PROVIDERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown LLM_PROVIDER {name!r}; expected one of {sorted(_PROVIDERS)}"
+        )
+    logger.info(f"Using {name} LLM provider")
+    return provider_class()
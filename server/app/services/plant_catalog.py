@@ -0,0 +1,245 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.dialect import insert_for
+from app.models.garden import (
+    PlantCatalogEntry as PlantCatalogModel,
+    PlantCatalogRegion as PlantCatalogRegionModel,
+)
+from app.services.climate_zones import lookup_zone
+from app.services.garden_recommendations import (
+    RECOMMENDATION_CATEGORIES,
+    plant_entries,
+    plant_payload,
+)
+from app.services.gemini import gemini_service
+
+logger = logging.getLogger(__name__)
+
+# Plant attributes copied from payloads into plant_catalog
+_ATTRIBUTES = (
+    "category",
+    "common_name",
+    "plant_type",
+    "sunlight_needs",
+    "water_needs",
+    "mature_size",
+    "spacing",
+)
+
+
+def catalog_region(zip_code: str) -> str:
+    """
+    Region a zip code's plants are catalogued under: its climate zone, or
+    its 3-digit prefix when the zone is unknown
+    """
+    zone = lookup_zone(zip_code)
+    return f"zone:{zone.key}" if zone else f"zip3:{zip_code[:3]}"
+
+
+def _normalize(name: str) -> str:
+    return " ".join(str(name or "").split())
+
+
+async def lookup(
+    db: AsyncSession,
+    region: str,
+    count_per_category: int,
+    exclude: Iterable[str] = (),
+) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Up to ``count_per_category`` catalog plants per category for ``region``,
+    curated and most often recommended first, skipping ``exclude``. Returns
+    the payload and how many plants each short category is missing.
+    """
+    stmt = (
+        select(PlantCatalogModel)
+        .join(
+            PlantCatalogRegionModel,
+            PlantCatalogRegionModel.plant_id == PlantCatalogModel.id,
+        )
+        .where(
+            PlantCatalogRegionModel.region == region,
+            or_(
+                PlantCatalogRegionModel.curated,
+                PlantCatalogRegionModel.seen_count
+                >= settings.PLANT_CATALOG_MIN_SIGHTINGS,
+            ),
+        )
+        .order_by(
+            PlantCatalogRegionModel.curated.desc(),
+            PlantCatalogRegionModel.seen_count.desc(),
+            PlantCatalogModel.id,
+        )
+    )
+    excluded = [_normalize(name) for name in exclude]
+    if excluded:
+        stmt = stmt.where(PlantCatalogModel.botanical_name.not_in(excluded))
+
+    picked: Dict[str, List[PlantCatalogModel]] = {
+        category: [] for category in RECOMMENDATION_CATEGORIES
+    }
+    for plant in await db.scalars(stmt):
+        bucket = picked.get(plant.category)
+        if bucket is not None and len(bucket) < count_per_category:
+            bucket.append(plant)
+
+    gaps = {
+        category: count_per_category - len(plants)
+        for category, plants in picked.items()
+        if len(plants) < count_per_category
+    }
+    payload = plant_payload(plant for plants in picked.values() for plant in plants)
+    return payload, gaps
+
+
+async def record_plants(
+    db: AsyncSession, region: str, data: Dict[str, Any], curated: bool = False
+) -> int:
+    """
+    Add a payload's plants to the catalog for ``region``. Gemini sightings
+    bump ``seen_count``; curated imports also overwrite plant attributes.
+    Returns the number of plants recorded. The caller commits.
+    """
+    # Fixed order so concurrent upserts lock rows in the same sequence
+    entries = sorted(plant_entries(data), key=lambda entry: entry["botanical_name"])
+    if not entries:
+        return 0
+
+    stmt = insert_for(db, PlantCatalogModel).values(
+        [dict(entry, curated=curated) for entry in entries]
+    )
+    if curated:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["botanical_name"],
+            set_={
+                **{column: stmt.excluded[column] for column in _ATTRIBUTES},
+                "curated": True,
+                "updated_at": func.now(),
+            },
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["botanical_name"])
+    await db.execute(stmt)
+
+    plant_ids = await db.scalars(
+        select(PlantCatalogModel.id)
+        .where(
+            PlantCatalogModel.botanical_name.in_(
+                [entry["botanical_name"] for entry in entries]
+            )
+        )
+        .order_by(PlantCatalogModel.id)
+    )
+    stmt = insert_for(db, PlantCatalogRegionModel).values(
+        [
+            {
+                "plant_id": plant_id,
+                "region": region,
+                "seen_count": 0 if curated else 1,
+                "curated": curated,
+            }
+            for plant_id in plant_ids
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["region", "plant_id"],
+        set_=(
+            {"curated": True, "updated_at": func.now()}
+            if curated
+            else {
+                "seen_count": PlantCatalogRegionModel.seen_count + 1,
+                "updated_at": func.now(),
+            }
+        ),
+    )
+    await db.execute(stmt)
+    return len(entries)
+
+
+def fill_gaps(
+    local: Dict[str, Any],
+    fresh: Dict[str, Any],
+    gaps: Dict[str, int],
+    exclude: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Top up the short categories of ``local`` with new plants from ``fresh``"""
+    recs = {
+        category: list(local["recommendedPlants"].get(category, []))
+        for category in RECOMMENDATION_CATEGORIES
+    }
+    taken = {_normalize(name) for name in exclude}
+    taken.update(
+        _normalize(plant.get("botanicalName"))
+        for plants in recs.values()
+        for plant in plants
+    )
+    for category, missing in gaps.items():
+        for plant in fresh.get("recommendedPlants", {}).get(category) or []:
+            if missing <= 0:
+                break
+            name = _normalize(plant.get("botanicalName"))
+            if name and name not in taken:
+                recs[category].append(plant)
+                taken.add(name)
+                missing -= 1
+    return {"recommendedPlants": recs}
+
+
+async def recommend_plants(
+    zip_code: str,
+    count_per_category: Optional[int] = None,
+    exclude: Iterable[str] = (),
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Plant recommendations for a zip code, answered from the catalog when it
+    covers every category and from Gemini only for the gaps. Without
+    ``count_per_category`` this is a garden's initial set, which uses the full
+    Gemini prompt when the catalog has nothing for the region. ``refresh``
+    skips the catalog. Gemini's plants are recorded for the region.
+    """
+    region = catalog_region(zip_code)
+    count = count_per_category or settings.PLANT_CATALOG_PER_CATEGORY
+    exclude = list(exclude)
+    local = plant_payload([])
+    gaps = {category: count for category in RECOMMENDATION_CATEGORIES}
+
+    if settings.PLANT_CATALOG_ENABLED and not refresh:
+        async with db_session.SessionLocal() as db:
+            local, gaps = await lookup(db, region, count, exclude)
+        if not gaps:
+            logger.info(f"Served recommendations for {zip_code} from the catalog")
+            return local
+
+    covered = any(local["recommendedPlants"].values())
+    if count_per_category is None and not covered:
+        fresh = await gemini_service.get_plant_recommendations(zip_code)
+        data = fresh
+    else:
+        if covered:
+            logger.info(f"Catalog gaps for {region}: {gaps}; asking Gemini")
+        have = [
+            plant["botanicalName"]
+            for plants in local["recommendedPlants"].values()
+            for plant in plants
+        ]
+        fresh = await gemini_service.get_more_plant_recommendations(
+            zip_code, exclude + have, max(gaps.values())
+        )
+        data = fill_gaps(local, fresh, gaps, exclude)
+
+    if settings.PLANT_CATALOG_ENABLED:
+        try:
+            async with db_session.SessionLocal() as db:
+                await record_plants(db, region, fresh)
+                await db.commit()
+        except Exception as e:
+            # The catalog only saves future calls; never fail this one over it
+            logger.warning(f"Failed to record plants for {region} in the catalog: {e}")
+    return data
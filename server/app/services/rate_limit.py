@@ -0,0 +1,105 @@
+import logging
+from datetime import datetime, timezone
+from typing import Tuple
+
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.dialect import insert_for
+from app.models.garden import RateLimitBucket as RateLimitBucketModel
+
+logger = logging.getLogger(__name__)
+
+# Times a take is retried when another worker updated the bucket in between
+_TAKE_ATTEMPTS = 5
+
+# Retry-After (seconds) of an endpoint group blocked with a rate of 0
+BLOCKED_RETRY_AFTER = 60.0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def bucket_limits(bucket: str) -> Tuple[float, float]:
+    """(capacity, tokens refilled per second) of an endpoint group"""
+    limits = {
+        "ask": (settings.RATE_LIMIT_ASK_BURST, settings.RATE_LIMIT_ASK_PER_MINUTE),
+        "recommendations": (
+            settings.RATE_LIMIT_RECOMMENDATIONS_BURST,
+            settings.RATE_LIMIT_RECOMMENDATIONS_PER_MINUTE,
+        ),
+    }
+    capacity, per_minute = limits[bucket]
+    return float(capacity), per_minute / 60
+
+
+async def take_token(user_id: str, bucket: str) -> float:
+    """
+    Take one token from the user's ``bucket``. Returns 0 when granted, else
+    the seconds until a token is available. Each take is a compare-and-set on
+    the bucket row, so concurrent requests on any worker never overspend it.
+    A per-minute rate of 0 (or less) blocks the group.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0.0
+    capacity, rate = bucket_limits(bucket)
+    if rate <= 0:
+        return BLOCKED_RETRY_AFTER
+
+    async with db_session.SessionLocal() as db:
+        for _ in range(_TAKE_ATTEMPTS):
+            row = (
+                await db.execute(
+                    select(
+                        RateLimitBucketModel.id,
+                        RateLimitBucketModel.tokens,
+                        RateLimitBucketModel.refilled_at,
+                    ).where(
+                        RateLimitBucketModel.user_id == user_id,
+                        RateLimitBucketModel.bucket == bucket,
+                    )
+                )
+            ).first()
+            now = _utcnow()
+            if row is None:
+                await db.execute(
+                    insert_for(db, RateLimitBucketModel)
+                    .values(
+                        user_id=user_id,
+                        bucket=bucket,
+                        tokens=capacity,
+                        refilled_at=now,
+                    )
+                    .on_conflict_do_nothing(index_elements=["user_id", "bucket"])
+                )
+                await db.commit()
+                continue
+
+            # SQLite hands back naive datetimes; everything is stored in UTC
+            refilled_at = row.refilled_at
+            if refilled_at.tzinfo is None:
+                refilled_at = refilled_at.replace(tzinfo=timezone.utc)
+            elapsed = max(0.0, (now - refilled_at).total_seconds())
+            tokens = min(capacity, row.tokens + elapsed * rate)
+            if tokens < 1:
+                await db.commit()
+                return (1 - tokens) / rate
+
+            result = await db.execute(
+                update(RateLimitBucketModel)
+                .where(
+                    RateLimitBucketModel.id == row.id,
+                    # Unchanged since read, else another request took a token
+                    RateLimitBucketModel.refilled_at == row.refilled_at,
+                )
+                .values(tokens=tokens - 1, refilled_at=now, updated_at=func.now())
+            )
+            await db.commit()
+            if result.rowcount == 1:
+                return 0.0
+
+    # Lost every race: the user is sending requests faster than one at a time
+    logger.warning(f"Rate limit bucket {bucket} of {user_id} is contended")
+    return 1 / rate
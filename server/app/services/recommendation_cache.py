@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.dialect import insert_for
+from app.models.garden import RecommendationCacheEntry as RecommendationCacheModel
+from app.services.climate_zones import location_key
+from app.services.gemini import GeminiUnavailableError, gemini_service
+from app.services.plant_catalog import recommend_plants
+from app.services.single_flight import SingleFlight, WorkerLock
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+# Seconds between cache re-checks while another worker fills the same key
+LOCK_POLL_INTERVAL = 0.25
+
+# (cache_key, prompt_version) -> (monotonic deadline, payload), least recently
+# used first. Per process; the recommendation_cache table is shared by all.
+_memory: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# In-flight cache fills of this process, keyed like the worker locks
+_flights = SingleFlight()
+
+
+class CachedRecommendations(NamedTuple):
+    data: Dict[str, Any]
+    # Served past its expiry because Gemini was unavailable
+    stale: bool
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _remember(key: CacheKey, data: Dict[str, Any], ttl: float) -> None:
+    _memory[key] = (time.monotonic() + ttl, data)
+    _memory.move_to_end(key)
+    while len(_memory) > settings.RECOMMENDATION_CACHE_MEMORY_SIZE:
+        _memory.popitem(last=False)
+
+
+def _recall(key: CacheKey) -> Optional[Dict[str, Any]]:
+    cached = _memory.get(key)
+    if cached is None:
+        return None
+    deadline, data = cached
+    if deadline <= time.monotonic():
+        del _memory[key]
+        return None
+    _memory.move_to_end(key)
+    return data
+
+
+async def get_cached(
+    db: AsyncSession,
+    cache_key: str,
+    prompt_version: str = gemini_service.RECOMMENDATIONS_PROMPT_VERSION,
+) -> Optional[Dict[str, Any]]:
+    """Unexpired payload for ``cache_key``, from this process or the DB"""
+    key = (cache_key, prompt_version)
+    data = _recall(key)
+    if data is not None:
+        return data
+
+    now = _utcnow()
+    row = (
+        await db.execute(
+            select(
+                RecommendationCacheModel.id,
+                RecommendationCacheModel.data,
+                RecommendationCacheModel.expires_at,
+            ).where(
+                RecommendationCacheModel.cache_key == cache_key,
+                RecommendationCacheModel.prompt_version == prompt_version,
+                RecommendationCacheModel.expires_at > now,
+            )
+        )
+    ).first()
+    if row is None:
+        return None
+
+    await db.execute(
+        update(RecommendationCacheModel)
+        .where(RecommendationCacheModel.id == row.id)
+        .values(last_used_at=now)
+    )
+    data = json.loads(row.data)
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    expires_at = row.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    _remember(key, data, (expires_at - now).total_seconds())
+    return data
+
+
+async def get_stale(db: AsyncSession, cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Newest payload kept for ``cache_key``, expired or not and from any prompt
+    version (the current one first). Only served while Gemini is unavailable,
+    so it never enters the in-memory tier.
+    """
+    now = _utcnow()
+    stale_since = now - timedelta(seconds=settings.RECOMMENDATION_CACHE_STALE_TTL)
+    data = await db.scalar(
+        select(RecommendationCacheModel.data)
+        .where(
+            RecommendationCacheModel.cache_key == cache_key,
+            RecommendationCacheModel.expires_at > stale_since,
+        )
+        .order_by(
+            (
+                RecommendationCacheModel.prompt_version
+                == gemini_service.RECOMMENDATIONS_PROMPT_VERSION
+            ).desc(),
+            RecommendationCacheModel.expires_at.desc(),
+        )
+        .limit(1)
+    )
+    return None if data is None else json.loads(data)
+
+
+async def store(
+    db: AsyncSession,
+    cache_key: str,
+    data: Dict[str, Any],
+    prompt_version: str = gemini_service.RECOMMENDATIONS_PROMPT_VERSION,
+) -> None:
+    """
+    Write ``data`` to both cache tiers and prune rows expired for longer than
+    RECOMMENDATION_CACHE_STALE_TTL and least recently used rows beyond
+    RECOMMENDATION_CACHE_MAX_ENTRIES. The caller commits.
+    """
+    ttl = settings.RECOMMENDATION_CACHE_TTL
+    now = _utcnow()
+    values = {
+        "cache_key": cache_key,
+        "prompt_version": prompt_version,
+        "data": json.dumps(data),
+        "expires_at": now + timedelta(seconds=ttl),
+        "last_used_at": now,
+    }
+    stmt = insert_for(db, RecommendationCacheModel).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cache_key", "prompt_version"],
+        set_={
+            **{
+                field: stmt.excluded[field]
+                for field in ("data", "expires_at", "last_used_at")
+            },
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+    stale_since = now - timedelta(seconds=settings.RECOMMENDATION_CACHE_STALE_TTL)
+    await db.execute(
+        delete(RecommendationCacheModel).where(
+            RecommendationCacheModel.expires_at <= stale_since
+        )
+    )
+    overflow = (
+        select(RecommendationCacheModel.id)
+        .order_by(
+            RecommendationCacheModel.last_used_at.desc(),
+            RecommendationCacheModel.id.desc(),
+        )
+        .offset(settings.RECOMMENDATION_CACHE_MAX_ENTRIES)
+    )
+    await db.execute(
+        delete(RecommendationCacheModel).where(
+            RecommendationCacheModel.id.in_(overflow)
+        )
+    )
+
+    _remember((cache_key, prompt_version), data, ttl)
+
+
+async def _fill_plant_recommendations(zip_code: str, refresh: bool) -> Dict[str, Any]:
+    """
+    Generate and store recommendations for a zip code's climate zone at most
+    once across workers: whoever holds the worker lock asks the plant catalog (and Gemini
+    for its gaps) while the others poll the cache, falling back to their own
+    call after SINGLE_FLIGHT_WAIT.
+    Runs on its own session because coalesced callers share the result. Neither
+    the session nor the lock keeps a connection checked out while the catalog
+    and Gemini run.
+    """
+    cache_key = location_key(zip_code)
+    lock_key = (
+        f"recommendations:{cache_key}:{gemini_service.RECOMMENDATIONS_PROMPT_VERSION}"
+    )
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+
+    async with db_session.SessionLocal() as db, WorkerLock(lock_key) as lock:
+        while True:
+            acquired = await lock.try_acquire()
+            if not refresh:
+                # Re-check after taking the lock too: the previous holder may
+                # have stored the payload just before releasing it
+                cached = await get_cached(db, cache_key)
+                await db.commit()
+                if cached is not None:
+                    return cached
+            if acquired:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting on another worker for {lock_key}")
+                break
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+        data = await recommend_plants(zip_code, refresh=refresh)
+        await store(db, cache_key, data)
+        await db.commit()
+        return data
+
+
+async def lookup_plant_recommendations(
+    db: AsyncSession, zip_code: str, refresh: bool = False
+) -> CachedRecommendations:
+    """
+    Plant recommendations for a zip code, served from the cache of its climate
+    zone when possible. Concurrent misses for the same zone share one call. ``refresh``
+    skips the lookup and replaces the cached payload. While Gemini is
+    unavailable the newest kept payload is served, even if expired, and
+    flagged as stale. The caller commits so a cache hit's last-used time is
+    recorded.
+    """
+    cache_key = location_key(zip_code)
+    if not refresh:
+        cached = await get_cached(db, cache_key)
+        if cached is not None:
+            logger.info(f"Recommendation cache hit for {cache_key}")
+            return CachedRecommendations(cached, stale=False)
+        # Don't hold the caller's connection while Gemini runs
+        await db.commit()
+
+    try:
+        data = await _flights.do(
+            f"{cache_key}:{gemini_service.RECOMMENDATIONS_PROMPT_VERSION}",
+            lambda: _fill_plant_recommendations(zip_code, refresh),
+        )
+    except GeminiUnavailableError:
+        stale = await get_stale(db, cache_key)
+        if stale is None:
+            raise
+        logger.warning(
+            f"Gemini unavailable, serving stale recommendations for {cache_key}"
+        )
+        return CachedRecommendations(stale, stale=True)
+    return CachedRecommendations(data, stale=False)
+
+
+async def cached_plant_recommendations(
+    db: AsyncSession, zip_code: str, refresh: bool = False
+) -> Dict[str, Any]:
+    """The payload of ``lookup_plant_recommendations``, stale or not"""
+    return (await lookup_plant_recommendations(db, zip_code, refresh)).data
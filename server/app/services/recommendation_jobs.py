@@ -0,0 +1,337 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.models.garden import (
+    Garden as GardenModel,
+    RecommendationJob as RecommendationJobModel,
+)
+from app.services import llm_metrics
+from app.services.garden_recommendations import (
+    add_recommendations,
+    recommended_botanical_names,
+    replace_recommendations,
+)
+from app.services.gemini import GeminiBusyError
+from app.services.plant_catalog import recommend_plants
+from app.services.recommendation_cache import cached_plant_recommendations
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Seconds a stopping worker pool waits for in-progress jobs before cancelling them
+SHUTDOWN_GRACE = 5.0
+
+# Set when a job is enqueued in this process so idle workers skip the poll wait
+_wakeup = asyncio.Event()
+
+
+class JobFailed(Exception):
+    """Permanent job failure; the message is reported to the client"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def find_active_job(
+    db: AsyncSession, garden_id: int, kind: str, params: Dict[str, Any]
+) -> Optional[RecommendationJobModel]:
+    """The garden's queued/running job of the same kind and parameters, if any"""
+    active = (
+        await db.execute(
+            select(RecommendationJobModel)
+            .where(
+                RecommendationJobModel.garden_id == garden_id,
+                RecommendationJobModel.kind == kind,
+                RecommendationJobModel.status.in_(ACTIVE_STATUSES),
+            )
+            .order_by(RecommendationJobModel.id.desc())
+        )
+    ).scalars()
+    for job in active:
+        if json.loads(job.params) == params:
+            return job
+    return None
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    garden_id: int,
+    user_id: str,
+    kind: str,
+    params: Dict[str, Any],
+) -> RecommendationJobModel:
+    """
+    Queue a job, or return the garden's queued/running job of the same kind
+    and parameters so repeated clicks don't stack up LLM calls.
+    """
+    job = await find_active_job(db, garden_id, kind, params)
+    if job is not None:
+        return job
+
+    job = RecommendationJobModel(
+        garden_id=garden_id,
+        user_id=user_id,
+        kind=kind,
+        status="queued",
+        params=json.dumps(params),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+async def _run_generate(garden_id: int, params: Dict[str, Any]) -> None:
+    async with db_session.SessionLocal() as db:
+        zip_code = await db.scalar(
+            select(GardenModel.zip_code).where(GardenModel.id == garden_id)
+        )
+        if zip_code is None:
+            raise JobFailed("Garden not found")
+        # Don't keep the connection checked out while the catalog or Gemini runs
+        await db.commit()
+        data = await cached_plant_recommendations(
+            db, zip_code, refresh=params.get("force_refresh", False)
+        )
+        await replace_recommendations(db, garden_id, data)
+        await db.commit()
+
+
+async def _run_more(garden_id: int, params: Dict[str, Any]) -> None:
+    # No session is held while the catalog or Gemini runs
+    async with db_session.SessionLocal() as db:
+        zip_code = await db.scalar(
+            select(GardenModel.zip_code).where(GardenModel.id == garden_id)
+        )
+        if zip_code is None:
+            raise JobFailed("Garden not found")
+        exclude = params.get(
+            "exclude_botanical_names"
+        ) or await recommended_botanical_names(db, garden_id)
+
+    more = await recommend_plants(
+        zip_code, params.get("count_per_category", 3), exclude=exclude
+    )
+
+    async with db_session.SessionLocal() as db:
+        # Plants recommended meanwhile (or despite the exclusions) are skipped
+        await add_recommendations(db, garden_id, more)
+        await db.commit()
+
+
+_RUNNERS = {"generate": _run_generate, "more": _run_more}
+
+
+async def _finish(job_id: int, **values: Any) -> None:
+    async with db_session.SessionLocal() as db:
+        await db.execute(
+            update(RecommendationJobModel)
+            .where(RecommendationJobModel.id == job_id)
+            .values(**values)
+        )
+        await db.commit()
+
+
+async def run_job(job: RecommendationJobModel) -> None:
+    """Run a claimed job and record its outcome"""
+    llm_metrics.current_route.set(f"job:{job.kind}")
+    try:
+        await _RUNNERS[job.kind](job.garden_id, json.loads(job.params))
+    except asyncio.CancelledError:
+        # Shutting down: hand the job to another worker, giving back the
+        # attempt so deploys don't push it towards JOB_MAX_ATTEMPTS
+        await _finish(
+            job.id,
+            status="queued",
+            worker_id=None,
+            attempts=RecommendationJobModel.attempts - 1,
+        )
+        raise
+    except GeminiBusyError as e:
+        if job.attempts < settings.JOB_MAX_ATTEMPTS:
+            logger.info(
+                f"Gemini unavailable ({e}), requeueing recommendation job"
+                f" {job.id} for {e.retry_after:.0f} s from now"
+            )
+            # Spread the attempts out without keeping this worker from other jobs
+            await _finish(
+                job.id,
+                status="queued",
+                worker_id=None,
+                available_at=_utcnow() + timedelta(seconds=e.retry_after),
+            )
+            return
+        await _finish(job.id, status="failed", error=str(e), finished_at=_utcnow())
+    except Exception as e:
+        logger.error(f"Recommendation job {job.id} ({job.kind}) failed: {e}")
+        await _finish(
+            job.id,
+            status="failed",
+            error=(
+                str(e)
+                if isinstance(e, JobFailed)
+                else "Failed to generate recommendations"
+            ),
+            finished_at=_utcnow(),
+        )
+    else:
+        await _finish(job.id, status="succeeded", finished_at=_utcnow())
+
+
+async def claim_next_job(worker_id: str) -> Optional[RecommendationJobModel]:
+    """
+    Atomically move the oldest queued job past its ``available_at`` to
+    'running' for ``worker_id``. The conditional UPDATE makes the claim safe on
+    any database; on Postgres SKIP LOCKED also keeps concurrent claimers off
+    the same row.
+    """
+    async with db_session.SessionLocal() as db:
+        while True:
+            stmt = (
+                select(RecommendationJobModel.id)
+                .where(
+                    RecommendationJobModel.status == "queued",
+                    or_(
+                        RecommendationJobModel.available_at.is_(None),
+                        RecommendationJobModel.available_at <= _utcnow(),
+                    ),
+                )
+                .order_by(RecommendationJobModel.id)
+                .limit(1)
+            )
+            if db.get_bind().dialect.name == "postgresql":
+                stmt = stmt.with_for_update(skip_locked=True)
+            job_id = await db.scalar(stmt)
+            if job_id is None:
+                await db.commit()
+                return None
+
+            result = await db.execute(
+                update(RecommendationJobModel)
+                .where(
+                    RecommendationJobModel.id == job_id,
+                    RecommendationJobModel.status == "queued",
+                )
+                .values(
+                    status="running",
+                    worker_id=worker_id,
+                    started_at=_utcnow(),
+                    attempts=RecommendationJobModel.attempts + 1,
+                )
+            )
+            await db.commit()
+            if result.rowcount == 1:
+                return await db.get(RecommendationJobModel, job_id)
+            # Another worker won the race; try the next job
+
+
+async def requeue_stale_jobs() -> None:
+    """
+    Requeue running jobs whose worker died (no finish within JOB_STALE_AFTER),
+    failing those that already used JOB_MAX_ATTEMPTS so a job that keeps
+    killing its worker is not retried forever
+    """
+    cutoff = _utcnow() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    stale = (
+        RecommendationJobModel.status == "running",
+        RecommendationJobModel.started_at < cutoff,
+    )
+    async with db_session.SessionLocal() as db:
+        failed = await db.execute(
+            update(RecommendationJobModel)
+            .where(*stale, RecommendationJobModel.attempts >= settings.JOB_MAX_ATTEMPTS)
+            .values(
+                status="failed",
+                worker_id=None,
+                error="Recommendation job did not finish, giving up",
+                finished_at=_utcnow(),
+            )
+        )
+        requeued = await db.execute(
+            update(RecommendationJobModel)
+            .where(*stale)
+            .values(status="queued", worker_id=None)
+        )
+        await db.commit()
+        if failed.rowcount:
+            logger.error(
+                f"Failed {failed.rowcount} stale recommendation jobs"
+                f" after {settings.JOB_MAX_ATTEMPTS} attempts"
+            )
+        if requeued.rowcount:
+            logger.warning(f"Requeued {requeued.rowcount} stale recommendation jobs")
+
+
+class JobWorkerPool:
+    """JOB_WORKERS asyncio tasks per process draining the recommendation_jobs table"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        # Monotonic time of the next stale job sweep, shared by the workers
+        self._next_sweep = 0.0
+
+    async def _sweep_if_due(self) -> None:
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + settings.JOB_STALE_SWEEP_INTERVAL
+        await requeue_stale_jobs()
+
+    async def _work(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await claim_next_job(worker_id)
+                if job is not None:
+                    await run_job(job)
+                    continue
+                await self._sweep_if_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Recommendation job worker {worker_id} error: {e}")
+
+            try:
+                await asyncio.wait_for(
+                    _wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+
+    def start(self) -> None:
+        prefix = uuid.uuid4().hex[:8]
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._work(f"{prefix}-{n}")) for n in range(self.size)
+        ]
+        logger.info(f"Started {self.size} recommendation job workers")
+
+    async def stop(self) -> None:
+        """
+        Let idle workers exit between DB round-trips, then cancel any still
+        running a job after SHUTDOWN_GRACE seconds (the job is requeued).
+        """
+        if not self._tasks:
+            return
+        self._stopping.set()
+        _wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=SHUTDOWN_GRACE)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
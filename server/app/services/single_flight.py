@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.dialect import insert_for
+from app.models.garden import LLMRequestLock as LLMRequestLockModel
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key inside one process: the
+    first caller runs the work, later callers await the same task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the outcome as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logger.info(f"Joining in-flight request for {key}")
+        # A disconnecting caller must not cancel the work for the others
+        return await asyncio.shield(task)
+
+
+class WorkerLock:
+    """
+    Best-effort mutex shared by all workers: a row in llm_request_locks that
+    expires after SINGLE_FLIGHT_LOCK_TTL so a crashed worker cannot wedge a key.
+    Acquiring and releasing each run in a short transaction of their own, so
+    no pooled connection is held while the lock is, which spans catalog and
+    Gemini calls.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.acquired = False
+        self._owner = uuid.uuid4().hex
+
+    async def __aenter__(self) -> "WorkerLock":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self.acquired:
+            await self._release()
+
+    async def try_acquire(self) -> bool:
+        if self.acquired:
+            return True
+        now = datetime.now(timezone.utc)
+        async with db_session.engine.begin() as conn:
+            await conn.execute(
+                delete(LLMRequestLockModel).where(
+                    LLMRequestLockModel.lock_key == self.key,
+                    LLMRequestLockModel.expires_at <= now,
+                )
+            )
+            result = await conn.execute(
+                insert_for(conn, LLMRequestLockModel)
+                .values(
+                    lock_key=self.key,
+                    owner=self._owner,
+                    expires_at=now + timedelta(seconds=settings.SINGLE_FLIGHT_LOCK_TTL),
+                )
+                .on_conflict_do_nothing(index_elements=["lock_key"])
+            )
+        self.acquired = result.rowcount == 1
+        return self.acquired
+
+    async def _release(self) -> None:
+        async with db_session.engine.begin() as conn:
+            await conn.execute(
+                delete(LLMRequestLockModel).where(
+                    LLMRequestLockModel.lock_key == self.key,
+                    LLMRequestLockModel.owner == self._owner,
+                )
+            )
+        self.acquired = False
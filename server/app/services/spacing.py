@@ -0,0 +1,156 @@
+import logging
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.garden import (
+    Garden as GardenModel,
+    GardenElement as GardenElementModel,
+)
+from app.schemas.garden import SpacingConflictReport
+
+logger = logging.getLogger(__name__)
+
+# Half of the 3x3 neighbourhood: every unordered pair of adjacent cells is
+# visited exactly once ((0, 0) pairs points within the same cell).
+_NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def spacing_conflict_pairs(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    spacings: np.ndarray,
+    grid_size: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find every pair of plants closer than their combined spacing. Returns
+    index arrays ``a`` and ``b`` plus the actual and required distances in
+    canvas units, worst overlaps first.
+
+    Each plant needs ``spacing / 2`` feet of clearance (the radius the canvas
+    draws), so plants i and j conflict when their centres are closer than
+    ``(spacing_i + spacing_j) / 2`` feet. Positions are in canvas units with
+    ``grid_size`` units per foot.
+
+    Broad phase: bucket plants into a uniform grid whose cells are as wide as
+    the largest possible required distance, so conflicting pairs always sit
+    in the same or adjacent cells. Narrow phase: exact distances for the
+    candidate pairs, all vectorized.
+    """
+    n = len(xs)
+    no_index, no_distance = np.empty(0, dtype=np.int64), np.empty(0)
+    empty = no_index, no_index, no_distance, no_distance
+    if n < 2:
+        return empty
+
+    points = np.column_stack((xs, ys)).astype(np.float64)
+    radii = np.nan_to_num(np.asarray(spacings, dtype=np.float64)) * grid_size / 2.0
+    cell_size = 2.0 * float(radii.max())
+    if cell_size <= 0.0:
+        return empty
+
+    cells = np.floor(points / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    # One spare row above and below each column so ky +/- 1 never aliases
+    # into the neighbouring column
+    height = int(cells[:, 1].max()) + 2
+    keys = cells[:, 0] * height + cells[:, 1]
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    positions = np.arange(n)
+
+    first_parts, second_parts = [], []
+    for dx, dy in _NEIGHBOUR_OFFSETS:
+        neighbour_keys = sorted_keys + dx * height + dy
+        hi = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+        if dx == 0 and dy == 0:
+            lo = positions + 1
+        else:
+            lo = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        # Expand (i, [lo_i, hi_i)) ranges into flat candidate pairs
+        first = np.repeat(positions, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = np.repeat(lo, counts) + offsets
+        first_parts.append(first)
+        second_parts.append(second)
+
+    if not first_parts:
+        return empty
+
+    a = order[np.concatenate(first_parts)]
+    b = order[np.concatenate(second_parts)]
+    distances = np.hypot(*(points[a] - points[b]).T)
+    required = radii[a] + radii[b]
+    hits = np.nonzero(distances < required)[0]
+
+    # Worst overlaps first
+    hits = hits[np.argsort(distances[hits] / required[hits], kind="stable")]
+    return a[hits], b[hits], distances[hits], required[hits]
+
+
+def find_spacing_conflicts(
+    element_ids: Sequence[str],
+    xs: np.ndarray,
+    ys: np.ndarray,
+    spacings: np.ndarray,
+    grid_size: float,
+) -> List[Dict[str, Any]]:
+    """
+    Spacing conflicts between plants as SpacingConflict-shaped dicts, with
+    distances in feet. Plain dicts are validated in bulk by the report model,
+    which is much cheaper than building one model per pair here.
+    """
+    a, b, distances, required = spacing_conflict_pairs(xs, ys, spacings, grid_size)
+    return [
+        {
+            "element_id_a": element_ids[i],
+            "element_id_b": element_ids[j],
+            "distance": distance,
+            "required_distance": need,
+        }
+        for i, j, distance, need in zip(
+            a.tolist(),
+            b.tolist(),
+            (distances / grid_size).tolist(),
+            (required / grid_size).tolist(),
+        )
+    ]
+
+
+async def garden_spacing_conflicts(
+    db: AsyncSession, garden: GardenModel
+) -> SpacingConflictReport:
+    """Load a garden's plant positions and report spacing conflicts"""
+    result = await db.execute(
+        select(
+            GardenElementModel.element_id,
+            GardenElementModel.position_x,
+            GardenElementModel.position_y,
+            GardenElementModel.spacing,
+        ).where(
+            GardenElementModel.garden_id == garden.id,
+            GardenElementModel.element_type == "plant",
+        )
+    )
+    rows = result.all()
+
+    conflicts: List[Dict[str, Any]] = []
+    if len(rows) >= 2:
+        element_ids, xs, ys, spacings = zip(*rows)
+        conflicts = find_spacing_conflicts(
+            element_ids,
+            np.fromiter(xs, dtype=np.float64, count=len(rows)),
+            np.fromiter(ys, dtype=np.float64, count=len(rows)),
+            np.array(spacings, dtype=np.float64),
+            float(garden.grid_size or 50),
+        )
+    return SpacingConflictReport(
+        garden_id=garden.id, plant_count=len(rows), conflicts=conflicts
+    )
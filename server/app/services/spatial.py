@@ -0,0 +1,176 @@
+import logging
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.garden import (
+    Garden as GardenModel,
+    GardenElement as GardenElementModel,
+)
+
+logger = logging.getLogger(__name__)
+
+BBox = Tuple[float, float, float, float]
+
+# Gardens whose grid index is kept in memory per process (non-Postgres only)
+GRID_CACHE_SIZE = 64
+
+# Elements fetched per IN (...) query when loading grid hits
+FETCH_CHUNK_SIZE = 500
+
+
+def parse_bbox(value: str) -> BBox:
+    """Parse ``x0,y0,x1,y1`` into a normalized (min_x, min_y, max_x, max_y)"""
+    try:
+        x0, y0, x1, y1 = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be four comma-separated numbers: x0,y0,x1,y1")
+    if not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+        raise ValueError("bbox values must be finite")
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def element_box():
+    """
+    SQL box covering an element: structures span width x height from their
+    position, plants and text are points. Must stay identical to the
+    expression of the ix_garden_elements_box GiST index.
+    """
+    zero = literal_column("0.0")
+    return func.box(
+        func.point(GardenElementModel.position_x, GardenElementModel.position_y),
+        func.point(
+            GardenElementModel.position_x
+            + func.coalesce(GardenElementModel.width, zero),
+            GardenElementModel.position_y
+            + func.coalesce(GardenElementModel.height, zero),
+        ),
+    )
+
+
+class GridIndex:
+    """Uniform-grid spatial index over axis-aligned element boxes"""
+
+    def __init__(self, element_ids: Sequence[str], boxes: Sequence[BBox]):
+        self.element_ids = list(element_ids)
+        self.boxes = list(boxes)
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+        if not self.boxes:
+            self.cell_size = 1.0
+            return
+
+        min_x = min(b[0] for b in self.boxes)
+        min_y = min(b[1] for b in self.boxes)
+        max_x = max(b[2] for b in self.boxes)
+        max_y = max(b[3] for b in self.boxes)
+        # Aim for roughly one element per cell
+        area = max((max_x - min_x) * (max_y - min_y), 1.0)
+        self.cell_size = max(math.sqrt(area / len(self.boxes)), 1.0)
+
+        for index, box in enumerate(self.boxes):
+            for cell in self._cells_for(box):
+                self.cells.setdefault(cell, []).append(index)
+
+    def _cells_for(self, box: BBox):
+        size = self.cell_size
+        for cx in range(math.floor(box[0] / size), math.floor(box[2] / size) + 1):
+            for cy in range(math.floor(box[1] / size), math.floor(box[3] / size) + 1):
+                yield cx, cy
+
+    def query(self, bbox: BBox) -> List[str]:
+        """Element IDs whose box intersects ``bbox``"""
+        x0, y0, x1, y1 = bbox
+        size = self.cell_size
+        cx0, cx1 = math.floor(x0 / size), math.floor(x1 / size)
+        cy0, cy1 = math.floor(y0 / size), math.floor(y1 / size)
+
+        candidates = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Viewport covers more cells than are occupied; walk the occupied ones
+            for (cx, cy), members in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(members)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    candidates.update(self.cells.get((cx, cy), ()))
+
+        return [
+            self.element_ids[i]
+            for i in sorted(candidates)
+            if self.boxes[i][0] <= x1
+            and self.boxes[i][2] >= x0
+            and self.boxes[i][1] <= y1
+            and self.boxes[i][3] >= y0
+        ]
+
+
+# garden_id -> (garden version, index), least recently used first
+_grid_cache: "OrderedDict[int, Tuple[int, GridIndex]]" = OrderedDict()
+
+
+async def _get_grid(db: AsyncSession, garden: GardenModel) -> GridIndex:
+    cached = _grid_cache.get(garden.id)
+    if cached and cached[0] == garden.version:
+        _grid_cache.move_to_end(garden.id)
+        return cached[1]
+
+    result = await db.execute(
+        select(
+            GardenElementModel.element_id,
+            GardenElementModel.position_x,
+            GardenElementModel.position_y,
+            GardenElementModel.width,
+            GardenElementModel.height,
+        ).where(GardenElementModel.garden_id == garden.id)
+    )
+    ids, boxes = [], []
+    for element_id, x, y, width, height in result:
+        x2, y2 = x + (width or 0.0), y + (height or 0.0)
+        ids.append(element_id)
+        boxes.append((min(x, x2), min(y, y2), max(x, x2), max(y, y2)))
+    grid = GridIndex(ids, boxes)
+
+    _grid_cache[garden.id] = (garden.version, grid)
+    _grid_cache.move_to_end(garden.id)
+    while len(_grid_cache) > GRID_CACHE_SIZE:
+        _grid_cache.popitem(last=False)
+    return grid
+
+
+async def elements_in_bbox(
+    db: AsyncSession, garden: GardenModel, bbox: BBox
+) -> List[GardenElementModel]:
+    """
+    Load the elements of a garden that intersect ``bbox``. Uses the GiST box
+    index on Postgres and a per-process grid index elsewhere.
+    """
+    if db.bind.dialect.name == "postgresql":
+        x0, y0, x1, y1 = bbox
+        viewport = func.box(func.point(x0, y0), func.point(x1, y1))
+        result = await db.execute(
+            select(GardenElementModel).where(
+                GardenElementModel.garden_id == garden.id,
+                element_box().op("&&")(viewport),
+            )
+        )
+        return list(result.scalars())
+
+    grid = await _get_grid(db, garden)
+    hits = grid.query(bbox)
+    elements: List[GardenElementModel] = []
+    for start in range(0, len(hits), FETCH_CHUNK_SIZE):
+        result = await db.execute(
+            select(GardenElementModel).where(
+                GardenElementModel.garden_id == garden.id,
+                GardenElementModel.element_id.in_(
+                    hits[start : start + FETCH_CHUNK_SIZE]
+                ),
+            )
+        )
+        elements.extend(result.scalars())
+    return elements
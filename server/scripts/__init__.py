@@ -0,0 +1 @@
+# Management scripts, run with `python -m scripts.<name>` from the server directory
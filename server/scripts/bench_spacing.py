@@ -0,0 +1,84 @@
+"""
+Benchmark the plant spacing conflict detector.
+
+Places N random plants on a garden-sized canvas, times
+find_spacing_conflicts and checks its output against an O(n^2) NumPy
+reference on the same data.
+
+    python -m scripts.bench_spacing [--plants 10000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.schemas.garden import SpacingConflictReport
+from app.services.spacing import find_spacing_conflicts, spacing_conflict_pairs
+
+
+def brute_force_pairs(xs, ys, spacings, grid_size):
+    radii = spacings * grid_size / 2.0
+    dx = xs[:, None] - xs[None, :]
+    dy = ys[:, None] - ys[None, :]
+    close = np.hypot(dx, dy) < radii[:, None] + radii[None, :]
+    a, b = np.nonzero(np.triu(close, k=1))
+    return set(zip(a.tolist(), b.tolist()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plants", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--grid-size", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = args.plants
+    # One plant per ~50 sq ft on average, spacings between 1 and 20 ft
+    extent = np.sqrt(n * 50.0) * args.grid_size
+    xs = rng.uniform(-extent / 2, extent / 2, n)
+    ys = rng.uniform(-extent / 2, extent / 2, n)
+    spacings = rng.choice([1, 2, 3, 4, 6, 8, 12, 20], n).astype(np.float64)
+    ids = [f"plant-{i}" for i in range(n)]
+
+    def timed(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+        return result, (
+            f"best {min(timings) * 1000:.1f} ms, "
+            f"median {np.median(timings) * 1000:.1f} ms over {args.repeat} runs"
+        )
+
+    _, pairs_time = timed(
+        lambda: spacing_conflict_pairs(xs, ys, spacings, args.grid_size)
+    )
+    conflicts, total_time = timed(
+        lambda: SpacingConflictReport(
+            garden_id=0,
+            plant_count=n,
+            conflicts=find_spacing_conflicts(ids, xs, ys, spacings, args.grid_size),
+        ).conflicts
+    )
+
+    print(f"plants:            {n}")
+    print(f"conflicts:         {len(conflicts)}")
+    print(f"detection:         {pairs_time}")
+    print(f"with report model:  {total_time}")
+
+    if n <= 20_000:
+        index = {element_id: i for i, element_id in enumerate(ids)}
+        found = {
+            tuple(sorted((index[c.element_id_a], index[c.element_id_b])))
+            for c in conflicts
+        }
+        expected = brute_force_pairs(xs, ys, spacings, args.grid_size)
+        print(f"matches O(n^2) reference: {found == expected}")
+
+
+if __name__ == "__main__":
+    main()
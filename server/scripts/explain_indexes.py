@@ -0,0 +1,119 @@
+"""
+Check that the hot garden queries are served by indexes.
+
+Runs EXPLAIN for the statements issued by the garden routes against the
+configured database and fails if any of them falls back to a table scan, or
+(on Postgres) if the viewport query does not use the GiST box index.
+
+    python -m scripts.explain_indexes
+"""
+
+import sys
+
+from sqlalchemy import create_engine, func, select, text
+
+from app.core.config import settings
+from app.models.garden import (
+    GardenElement as GardenElementModel,
+    GardenNote as GardenNoteModel,
+    GardenRecommendedPlant as GardenRecommendedPlantModel,
+)
+from app.services.spatial import element_box
+
+# (description, statement, tables that must not be scanned)
+CHECKS = [
+    (
+        "update_element/delete_element lookup",
+        select(GardenElementModel).filter(
+            GardenElementModel.garden_id == 1,
+            GardenElementModel.element_id == "element",
+        ),
+        "garden_elements",
+    ),
+    (
+        "get_garden elements / snapshot diff",
+        select(GardenElementModel).filter(GardenElementModel.garden_id == 1),
+        "garden_elements",
+    ),
+    (
+        "list_notes",
+        select(GardenNoteModel)
+        .filter(GardenNoteModel.garden_id == 1)
+        .order_by(GardenNoteModel.created_at.desc()),
+        "garden_notes",
+    ),
+    (
+        "garden recommendations lookup",
+        select(GardenRecommendedPlantModel)
+        .filter(GardenRecommendedPlantModel.garden_id == 1)
+        .order_by(GardenRecommendedPlantModel.id),
+        "garden_recommended_plants",
+    ),
+]
+
+# Postgres only (other databases use the in-process grid index):
+# (description, statement, index the plan must use)
+POSTGRES_CHECKS = [
+    (
+        "list_elements_in_viewport (bbox)",
+        select(GardenElementModel).where(
+            GardenElementModel.garden_id == 1,
+            element_box().op("&&")(
+                func.box(func.point(0.0, 0.0), func.point(100.0, 100.0))
+            ),
+        ),
+        "ix_garden_elements_box",
+    ),
+]
+
+
+def explain(conn, stmt) -> str:
+    """Return the query plan as text for the connection's dialect"""
+    compiled = stmt.compile(
+        dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+    )
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"EXPLAIN {compiled}")).fetchall()
+        return "\n".join(row[0] for row in rows)
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def uses_table_scan(plan: str, table: str, dialect: str) -> bool:
+    if dialect == "postgresql":
+        return f"Seq Scan on {table}" in plan
+    return any(
+        line.strip().startswith(f"SCAN {table}") and "INDEX" not in line
+        for line in plan.splitlines()
+    )
+
+
+def main() -> int:
+    engine = create_engine(settings.get_database_url())
+    failures = 0
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Small tables make sequential scans cheaper; ask whether an index
+            # *can* serve the query rather than whether it is chosen today.
+            conn.execute(text("SET enable_seqscan = off"))
+        for description, stmt, table in CHECKS:
+            plan = explain(conn, stmt)
+            scanned = uses_table_scan(plan, table, conn.dialect.name)
+            failures += scanned
+            print(f"[{'FAIL' if scanned else 'ok'}] {description}")
+            for line in plan.splitlines():
+                print(f"    {line}")
+        if conn.dialect.name == "postgresql":
+            for description, stmt, index in POSTGRES_CHECKS:
+                plan = explain(conn, stmt)
+                missed = index not in plan
+                failures += missed
+                print(f"[{'FAIL' if missed else 'ok'}] {description}")
+                for line in plan.splitlines():
+                    print(f"    {line}")
+    engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Fill the local plant catalog that answers recommendations without Gemini.
+
+Backfill from recommendations Gemini already produced (the shared
+recommendation cache and every garden's stored plants). Each run counts the
+sightings again, so backfill once:
+
+    python -m scripts.import_plant_catalog --backfill
+
+Or import curated plants from a CSV file with a ``region`` (e.g. zone:7a-humid) or
+``zip_code`` column, a ``category`` column (shadeTrees, fruitTrees,
+floweringShrubs, vegetables, herbs) and the plant fields commonName,
+botanicalName, plantType, sunlightNeeds, waterNeeds, matureSize, spacing:
+
+    python -m scripts.import_plant_catalog curated.csv
+
+Curated plants are always served for their region and their attributes
+replace what Gemini reported.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+
+from app.db import session as db_session
+from app.models.garden import (
+    Garden as GardenModel,
+    GardenRecommendedPlant as GardenRecommendedPlantModel,
+    RecommendationCacheEntry as RecommendationCacheModel,
+)
+from app.services.garden_recommendations import (
+    RECOMMENDATION_CATEGORIES,
+    plant_payload,
+)
+from app.services.plant_catalog import catalog_region, record_plants
+
+PLANT_FIELDS = (
+    "commonName",
+    "botanicalName",
+    "plantType",
+    "sunlightNeeds",
+    "waterNeeds",
+    "matureSize",
+    "spacing",
+)
+
+
+def read_curated(path: str) -> Dict[str, Dict[str, Any]]:
+    """region -> recommendation payload of the CSV's plants"""
+    payloads: Dict[str, Dict[str, Any]] = {}
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            region = row.get("region") or catalog_region(row.get("zip_code") or "")
+            category = row.get("category")
+            if category not in RECOMMENDATION_CATEGORIES or region == "zip3:":
+                raise SystemExit(f"{path}:{line}: needs a region and a category")
+            recs = payloads.setdefault(region, {"recommendedPlants": {}})[
+                "recommendedPlants"
+            ]
+            recs.setdefault(category, []).append(
+                {field: row[field] for field in PLANT_FIELDS if row.get(field)}
+            )
+    return payloads
+
+
+async def backfill(db) -> int:
+    """Record every cached and stored payload as one Gemini sighting per region"""
+    recorded = 0
+    cached = await db.execute(
+        select(RecommendationCacheModel.cache_key, RecommendationCacheModel.data)
+    )
+    for cache_key, data in cached.all():
+        if cache_key.startswith("zone:"):
+            region = cache_key
+        elif cache_key.startswith("zip:"):
+            region = catalog_region(cache_key[len("zip:") :])
+        else:
+            continue
+        recorded += await record_plants(db, region, json.loads(data))
+
+    by_garden: Dict[Any, List[GardenRecommendedPlantModel]] = defaultdict(list)
+    rows = await db.execute(
+        select(GardenModel.zip_code, GardenRecommendedPlantModel)
+        .join(GardenModel, GardenModel.id == GardenRecommendedPlantModel.garden_id)
+        .order_by(GardenRecommendedPlantModel.id)
+    )
+    for zip_code, plant in rows.all():
+        by_garden[(plant.garden_id, zip_code)].append(plant)
+    for (_, zip_code), plants in by_garden.items():
+        recorded += await record_plants(
+            db, catalog_region(zip_code), plant_payload(plants)
+        )
+    return recorded
+
+
+async def run(args: argparse.Namespace) -> None:
+    db_session.init_engine()
+    try:
+        async with db_session.SessionLocal() as db:
+            if args.backfill:
+                recorded = await backfill(db)
+                print(f"Recorded {recorded} plant sightings from past responses")
+            for path in args.csv:
+                payloads = read_curated(path)
+                recorded = 0
+                for region, data in payloads.items():
+                    recorded += await record_plants(db, region, data, curated=True)
+                print(f"Imported {recorded} curated plants from {path}")
+            await db.commit()
+    finally:
+        await db_session.dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("csv", nargs="*", help="curated plant CSV files")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="record plants from cached and stored recommendations",
+    )
+    args = parser.parse_args()
+    if not args.backfill and not args.csv:
+        parser.error("pass --backfill and/or curated CSV files")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
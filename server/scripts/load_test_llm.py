@@ -0,0 +1,120 @@
+"""
+Load-test the LLM-backed endpoints of a running API.
+
+Start the server with the stub provider so no Gemini quota is used, e.g.
+
+    LLM_PROVIDER=stub LLM_STUB_LATENCY=1.5 uvicorn app.main:app --workers 4
+
+then fire concurrent requests at it with a valid Clerk session token:
+
+    python -m scripts.load_test_llm --token $TOKEN [--endpoint recommendations]
+        [--requests 200] [--concurrency 20] [--zip-codes 50]
+
+Reports status codes and latency percentiles; for --endpoint ask-stream the
+time to first byte is reported as well.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+
+def percentiles(label: str, samples: List[float]) -> str:
+    if not samples:
+        return f"{label}: no samples"
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return f"{label}: p50 {p50:.0f} ms, p95 {p95:.0f} ms, p99 {p99:.0f} ms"
+
+
+async def one_request(
+    client: httpx.AsyncClient, endpoint: str, zip_code: str
+) -> Tuple[int, float, Optional[float]]:
+    """Status code, total latency and (for streams) time to first byte"""
+    start = time.perf_counter()
+    if endpoint == "recommendations":
+        response = await client.post(
+            "/api/v1/garden/plant-recommendations", json={"zip_code": zip_code}
+        )
+        return response.status_code, time.perf_counter() - start, None
+
+    question = f"What grows well in {zip_code} this month?"
+    if endpoint == "ask":
+        response = await client.post("/api/v1/garden/ask", json={"question": question})
+        return response.status_code, time.perf_counter() - start, None
+
+    first_byte = None
+    async with client.stream(
+        "POST", "/api/v1/garden/ask/stream", json={"question": question}
+    ) as response:
+        async for _ in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+    return response.status_code, time.perf_counter() - start, first_byte
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    zip_codes = [f"{rng.randrange(10000, 99999)}" for _ in range(args.zip_codes)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results: List[Tuple[int, float, Optional[float]]] = []
+
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"Authorization": f"Bearer {args.token}"},
+        timeout=args.timeout,
+    ) as client:
+
+        async def worker(zip_code: str) -> None:
+            async with semaphore:
+                try:
+                    results.append(await one_request(client, args.endpoint, zip_code))
+                except httpx.HTTPError as e:
+                    results.append((0, args.timeout, None))
+                    print(f"request failed: {e!r}")
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(rng.choice(zip_codes)) for _ in range(args.requests))
+        )
+        elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _, _ in results)
+    print(
+        f"{len(results)} requests in {elapsed:.1f} s ({len(results) / elapsed:.1f}/s)"
+    )
+    print("status codes:", dict(sorted(statuses.items())))
+    print(percentiles("latency", [latency for _, latency, _ in results]))
+    if args.endpoint == "ask-stream":
+        print(percentiles("first byte", [ttfb for _, _, ttfb in results if ttfb]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Clerk session token")
+    parser.add_argument(
+        "--endpoint",
+        choices=["recommendations", "ask", "ask-stream"],
+        default="recommendations",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--zip-codes",
+        type=int,
+        default=50,
+        help="distinct zip codes to spread recommendation requests over",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Pre-generate plant recommendations for the most common garden locations.
+
+Reads the distinct gardens.zip_code values, groups them by cache key
+(climate zone, or zip code when the zone is unknown) ranked by how many
+gardens they cover, and fills the shared recommendation cache for each key
+through the same path as the API:
+
+    python -m scripts.warm_recommendation_cache [--limit 50] [--concurrency 4]
+
+Keys already cached are skipped, so an interrupted run resumes where it
+stopped when started again. Keys that could only be answered from an expired
+payload (Gemini unavailable) are reported as stale and fail the run. Safe to
+run next to live workers: fills take the same cross-worker lock, so no
+location is generated twice.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, select
+
+from app.db import session as db_session
+from app.models.garden import Garden as GardenModel
+from app.services import llm_metrics
+from app.services.climate_zones import location_key
+from app.services.recommendation_cache import (
+    get_cached,
+    lookup_plant_recommendations,
+)
+
+
+async def ranked_locations() -> List[Tuple[str, str, int]]:
+    """(cache key, most common zip code, gardens) by descending garden count"""
+    async with db_session.SessionLocal() as db:
+        rows = await db.execute(
+            select(GardenModel.zip_code, func.count(GardenModel.id)).group_by(
+                GardenModel.zip_code
+            )
+        )
+        counts = rows.all()
+
+    gardens: Counter = Counter()
+    top_zip: Dict[str, Tuple[int, str]] = {}
+    for zip_code, count in counts:
+        key = location_key(zip_code)
+        gardens[key] += count
+        if (count, zip_code) > top_zip.get(key, (0, "")):
+            top_zip[key] = (count, zip_code)
+    return [(key, top_zip[key][1], count) for key, count in gardens.most_common()]
+
+
+async def warm(key: str, zip_code: str) -> str:
+    """Fill one cache key unless it is already cached; returns the outcome"""
+    async with db_session.SessionLocal() as db:
+        if await get_cached(db, key) is not None:
+            await db.commit()
+            return "cached"
+        result = await lookup_plant_recommendations(db, zip_code)
+        await db.commit()
+    # Gemini was unavailable and an expired payload came back; nothing stored
+    return "stale" if result.stale else "warmed"
+
+
+async def run(args: argparse.Namespace) -> int:
+    db_session.init_engine()
+    llm_metrics.current_route.set("script:warm_recommendation_cache")
+    try:
+        locations = await ranked_locations()
+        if args.limit:
+            locations = locations[: args.limit]
+        print(f"{len(locations)} locations to warm")
+        if args.dry_run:
+            for key, zip_code, gardens in locations:
+                print(f"  {key} ({gardens} gardens, via {zip_code})")
+            return 0
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        outcomes: Counter = Counter()
+
+        async def worker(key: str, zip_code: str, gardens: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    outcome = await warm(key, zip_code)
+                except Exception as e:
+                    outcome = "failed"
+                    print(f"[failed] {key}: {e}")
+                else:
+                    elapsed = time.perf_counter() - start
+                    print(f"[{outcome}] {key} ({gardens} gardens) in {elapsed:.1f} s")
+                outcomes[outcome] += 1
+
+        await asyncio.gather(*(worker(*location) for location in locations))
+        print(", ".join(f"{count} {outcome}" for outcome, count in outcomes.items()))
+        return 1 if outcomes["failed"] or outcomes["stale"] else 0
+    finally:
+        await db_session.dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--limit", type=int, default=0, help="warm only the N most common locations"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="locations generated at once (keep at or below GEMINI_MAX_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="list the locations and exit"
+    )
+    raise SystemExit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()